@@ -1,47 +1,3497 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import paramiko
+import importlib
+import hashlib
+import hmac
+import threading
 import os
 import sys
-import cv2
-import numpy as np
 import subprocess
 import time
 from collections import deque
 from datetime import datetime
 import shlex
-import psutil
-import pywhatkit as kit
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image, ImageDraw, ImageFilter
 import io
+import csv
 import tempfile
+import mmap
+import struct
 import shutil
-from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.impute import SimpleImputer, KNNImputer
-from sklearn.experimental import enable_iterative_imputer
-from sklearn.impute import IterativeImputer
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.linear_model import LinearRegression
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from pathlib import Path, PurePosixPath
+import zipfile
+import tarfile
 import random
+import json
+from urllib.parse import urlparse, parse_qs, quote
+import functools
+import itertools
+import heapq
+import bisect
+import http.server
+from contextlib import contextmanager
+import contextvars
+import cProfile
+import pstats
+import re
+import fnmatch
+import codecs
+from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# --- Dependency Check for Optional Libraries ---
-# (This section remains the same)
+# --- Page Configuration ---
+st.set_page_config(page_title="Dev Control Center", page_icon="⚙️", layout="wide")
+
+
+# --- Lazy Dependency Loading ---
+# Heavy third-party libraries (paramiko, sklearn, plotly, matplotlib, psutil, ...)
+# are not imported at module top. Each run_* mode imports its own dependencies
+# through lazy_import() on first use, so opening one mode does not pay for the
+# others. Import times are kept process-wide so cold starts after a
+# worker recycle can be compared in the sidebar.
+@st.cache_resource
+def get_import_timings():
+    """Process-wide record of how long each lazily imported module took to load."""
+    return {}
+
+def lazy_import(module_name):
+    """Imports a module on first use and records how long the import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    get_import_timings()[module_name] = time.perf_counter() - start
+    return module
+
+def show_import_timings():
+    """Renders the recorded import times in the sidebar, slowest first."""
+    timings = get_import_timings()
+    if not timings:
+        return
+    with st.sidebar.expander("⏱️ Import Timings"):
+        st.caption(f"Total: {sum(timings.values()) * 1000:.0f} ms across {len(timings)} modules")
+        for name, seconds in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+            st.text(f"{seconds * 1000:8.1f} ms  {name}")
+
+
+# --- Metrics Exporter ---
+# A tiny in-process metrics registry: counters and fixed-bucket histograms are
+# updated with one dict lookup under a lock, and collectors (host sampler,
+# connection pools) are only evaluated when the endpoint is scraped. The
+# Prometheus text format is served by a stdlib HTTP server on a daemon thread,
+# so enabling the endpoint adds nothing to a rerun. Set DCC_METRICS_PORT to
+# start it with the app, or toggle it from the sidebar.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}_total", dict(zip(self.labelnames, key)), value
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [count per bucket..., count above last bucket, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": "+Inf" if bound == float("inf") else repr(bound)}, cumulative
+            yield f"{self.name}_sum", labels, values[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+class MetricsRegistry:
+    """Named metrics plus scrape-time collectors, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.metrics.setdefault(name, Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        # Counter families are named with their _total suffix, as the 0.0.4 text format expects
+        families = [(m.name + ("_total" if m.kind == "counter" else ""), m.kind, m.help, m.samples())
+                    for m in self.metrics.values()]
+        for collector in self.collectors:
+            try:
+                # Collectors yield (name, kind, help, [(labels, value), ...]) families
+                for name, kind, help_text, points in collector():
+                    name += "_total" if kind == "counter" else ""
+                    families.append((name, kind, help_text, [(name, labels, value) for labels, value in points]))
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', collector)} failed: {e}")
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{sample}{_format_labels(labels)} {value}" for sample, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+@st.cache_resource
+def get_metrics():
+    """Process-wide registry with the app's built-in metrics."""
+    registry = MetricsRegistry()
+    registry.histogram("dcc_rerun_seconds", "Script rerun duration by app mode.", ["mode"])
+    registry.histogram("dcc_ssh_command_seconds", "Remote command duration over pooled SSH connections.", ["outcome"])
+    registry.histogram("dcc_kubernetes_api_seconds", "Kubernetes API request duration (WATCH is time to first byte).", ["verb"])
+    registry.histogram("dcc_github_request_seconds", "GitHub API request duration.", ["method"])
+    registry.counter("dcc_errors", "Failed external calls.", ["kind"])
+    registry.counter("dcc_cache_requests", "Cache lookups by cache and result.", ["cache", "result"])
+    registry.collectors.extend([collect_app_metrics, collect_host_metrics])
+    return registry
+
+def observe(name, seconds, **labels):
+    """Records one duration in a built-in histogram."""
+    get_metrics().metrics[name].observe(seconds, **labels)
+
+def collect_app_metrics():
+    pool = get_ssh_pool().hosts()
+    yield "dcc_ssh_pool_connections", "gauge", "Pooled SSH connections.", [
+        ({"alive": str(alive).lower()}, sum(1 for h in pool if h["Alive"] == alive)) for alive in (True, False)]
+    informers = get_informers()
+    with informers["lock"]:
+        kinds = dict(informers["kinds"])
+    if kinds:
+        yield "dcc_kubernetes_informer_objects", "gauge", "Objects held by each Kubernetes informer cache.", [
+            ({"kind": kind}, len(informer)) for kind, informer in kinds.items()]
+
+class MetricsServer:
+    """Serves the registry at /metrics from a ThreadingHTTPServer on a daemon thread."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._server = None
+        self._thread = None
+        self.address = None
+
+    @property
+    def running(self):
+        return self._server is not None
+
+    def start(self, port=9464, host="127.0.0.1"):
+        if self.running:
+            return
+        registry = self.registry
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address = f"http://{host}:{self._server.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+@st.cache_resource
+def get_metrics_server():
+    """Process-wide metrics endpoint; started from the environment or the sidebar."""
+    server = MetricsServer(get_metrics())
+    if os.environ.get("DCC_METRICS_PORT"):
+        server.start(int(os.environ["DCC_METRICS_PORT"]), os.environ.get("DCC_METRICS_HOST", "127.0.0.1"))
+        get_host_sampler().start()
+    return server
+
+def show_metrics_exporter():
+    """Sidebar controls for the metrics endpoint."""
+    server = get_metrics_server()
+    with st.sidebar.expander("📡 Metrics Endpoint"):
+        if server.running:
+            st.caption(f"Serving {server.address}")
+            if st.button("⏹️ Stop endpoint"):
+                server.stop()
+                st.rerun()
+        else:
+            port = st.number_input("Port", min_value=1024, max_value=65535, value=9464)
+            if st.button("▶️ Start endpoint"):
+                try:
+                    server.start(int(port))
+                except OSError as e:
+                    st.error(f"Could not bind port {port}: {e}")
+                else:
+                    get_host_sampler().start()
+                    st.rerun()
+
+
+# --- Rerun Diagnostics ---
+# Every router pass records a trace: the mode, its render time, and each
+# external call (SSH exec, Kubernetes request, GitHub request, git subprocess)
+# and cache lookup made on the script thread. The trace lives in a ContextVar,
+# so concurrent sessions never mix, and calls on worker threads only reach
+# the aggregate metrics. A rerun can also be captured with cProfile or a
+# stack sampler whose output is a folded-stacks flamegraph file.
+_rerun_trace = contextvars.ContextVar("dcc_rerun_trace", default=None)
+
+@st.cache_resource
+def get_rerun_traces():
+    """Process-wide ring buffer of the most recent rerun traces."""
+    return deque(maxlen=500)
+
+def diagnostics_enabled():
+    """Whether this session may open Diagnostics, which shows every session's traces and profiles."""
+    # Only the server decides: DCC_DIAGNOSTICS turns it on for everyone, while
+    # DCC_DIAGNOSTICS_TOKEN lets a session in that opens ?diagnostics=<token>
+    if os.environ.get("DCC_DIAGNOSTICS"):
+        return True
+    token = os.environ.get("DCC_DIAGNOSTICS_TOKEN")
+    return bool(token) and hmac.compare_digest(st.query_params.get("diagnostics", "").encode(), token.encode())
+
+def record_call(kind, label, seconds):
+    """Adds one external call to the current rerun's trace, if there is one."""
+    trace = _rerun_trace.get()
+    if trace is not None:
+        trace["calls"].append((kind, label, seconds))
+
+@contextmanager
+def timed_call(kind, label, metric=None, **labels):
+    """Times a block as an external call: into the rerun trace and, optionally, a histogram."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        if metric:
+            observe(metric, seconds, **labels)
+        record_call(kind, label, seconds)
+
+def record_cache(cache, hit):
+    """Counts a cache lookup in the metrics and the current rerun's trace."""
+    result = "hit" if hit else "miss"
+    get_metrics().metrics["dcc_cache_requests"].inc(cache=cache, result=result)
+    trace = _rerun_trace.get()
+    if trace is not None:
+        trace["cache"][f"{cache} {result}"] = trace["cache"].get(f"{cache} {result}", 0) + 1
+
+@contextmanager
+def trace_rerun(mode):
+    """Times one router pass (including st.rerun()/st.stop() exits) and keeps its trace."""
+    trace = {"time": time.time(), "mode": mode, "seconds": None, "calls": [], "cache": {}}
+    token = _rerun_trace.set(trace)
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace["seconds"] = time.perf_counter() - started
+        _rerun_trace.reset(token)
+        observe("dcc_rerun_seconds", trace["seconds"], mode=mode)
+        get_rerun_traces().append(trace)
+
+class StackSampler:
+    """Samples one thread's Python stack on a timer and counts folded stacks."""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                stack = ";".join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+                self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        """Brendan Gregg's collapsed-stack format, readable by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.stacks.items())) + "\n"
+
+@contextmanager
+def profile_rerun(mode):
+    """Profiles this rerun when the session asked for a profile of this mode."""
+    request = st.session_state.get("diag_profile_request")
+    if not request or request["mode"] != mode:
+        yield
+        return
+    del st.session_state["diag_profile_request"]
+    started = time.perf_counter()
+    if request["kind"] == "cProfile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = StackSampler(threading.get_ident())
+        profiler.start()
+    try:
+        yield
+    finally:
+        result = {"mode": mode, "kind": request["kind"], "time": time.time(), "seconds": time.perf_counter() - started}
+        if request["kind"] == "cProfile":
+            profiler.disable()
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(40)
+            result["report"] = report.getvalue()
+            with tempfile.NamedTemporaryFile(suffix=".prof", delete=False) as f:
+                path = f.name
+            try:
+                profiler.dump_stats(path)
+                result["file"] = Path(path).read_bytes()
+            finally:
+                os.unlink(path)
+        else:
+            profiler.stop()
+            result["samples"] = profiler.samples
+            result["stacks"] = profiler.stacks
+            result["file"] = profiler.folded().encode()
+        profiles = st.session_state.setdefault("diag_profiles", [])
+        profiles.insert(0, result)
+        del profiles[5:]
+
+
+# --- SSH Connection Pool ---
+# One authenticated paramiko transport per (host, user), shared by every session
+# and rerun. Commands open their own channels on that transport, so several
+# execs run multiplexed over one TCP connection. Liveness is read from the
+# transport state (kept fresh by keepalives) instead of an extra exec, and a
+# dead or disconnected host is evicted on its own without touching the others.
+class SSHConnectionPool:
+    """Thread-safe pool of SSH clients keyed by host and username."""
+
+    KEEPALIVE_INTERVAL = 30  # seconds between transport keepalive packets
+    CONNECT_TIMEOUT = 5
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (host, user): {"client", "secret", "created"}
+
+    @staticmethod
+    def _secret(password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    @staticmethod
+    def is_alive(client):
+        """Cheap liveness check: no round trip, just the transport state."""
+        transport = client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def get(self, host, user, password):
+        """Returns a live client for (host, user), connecting only when needed."""
+        key = (host, user)
+        secret = self._secret(password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["secret"] == secret and self.is_alive(entry["client"]):
+                return entry["client"]
+        # Connect before touching the pooled entry: a wrong password from one
+        # session must not disconnect everyone sharing this host's transport
+        client = self._connect(host, user, password)
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing and existing["secret"] == secret and self.is_alive(existing["client"]):
+                # Another session connected concurrently; keep theirs
+                client.close()
+                return existing["client"]
+            self._entries[key] = {"client": client, "secret": secret, "created": time.time()}
+        if existing:
+            # Dead transport, or the password changed and the new one works
+            self._close(existing)
+        return client
+
+    def _connect(self, host, user, password):
+        paramiko = lazy_import("paramiko")
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(hostname=host, username=user, password=password, timeout=self.CONNECT_TIMEOUT)
+        client.get_transport().set_keepalive(self.KEEPALIVE_INTERVAL)
+        return client
+
+    @staticmethod
+    def _close(entry):
+        try:
+            entry["client"].close()
+        except Exception:
+            pass
+
+    def client(self, host, user):
+        """The live pooled client for (host, user), for shared background work that holds no password."""
+        with self._lock:
+            entry = self._entries.get((host, user))
+            if entry and self.is_alive(entry["client"]):
+                return entry["client"]
+        raise ConnectionError(f"No live SSH connection to {user}@{host}")
+
+    def evict(self, host, user):
+        """Closes and forgets the connection for one host, leaving the rest intact."""
+        with self._lock:
+            entry = self._entries.pop((host, user), None)
+        if entry:
+            self._close(entry)
+
+    def evict_dead(self):
+        """Drops every pooled connection whose transport has gone away."""
+        with self._lock:
+            dead = [key for key, entry in self._entries.items() if not self.is_alive(entry["client"])]
+            entries = [self._entries.pop(key) for key in dead]
+        for entry in entries:
+            self._close(entry)
+        return dead
+
+    def hosts(self):
+        """Snapshot of pooled connections for display."""
+        with self._lock:
+            return [
+                {"Host": host, "User": user, "Alive": self.is_alive(entry["client"]),
+                 "Age (s)": int(time.time() - entry["created"])}
+                for (host, user), entry in self._entries.items()
+            ]
+
+@st.cache_resource
+def get_ssh_pool():
+    """Process-wide SSH connection pool shared by all sessions."""
+    return SSHConnectionPool()
+
+def run_remote_command(ssh_client, cmd, timeout=None):
+    """Executes a command on the remote host using the provided client."""
+    try:
+        command = RemoteCommand(ssh_client, cmd, timeout=timeout, max_lines=None)
+        for _ in command:
+            pass
+        if command.timed_out:
+            return command.stdout, f"Command timed out after {timeout}s", -1
+        return command.stdout, command.stderr, command.exit_code
+    except Exception as e:
+        get_ssh_pool().evict_dead()
+        get_metrics().metrics["dcc_errors"].inc(kind="ssh")
+        return None, f"Command Execution ERROR: {e}", -1
+
+
+# --- Streaming Remote Execution ---
+# Reads stdout and stderr from one loop in small chunks, so neither side can
+# fill its channel window and stall the remote process while we block on the
+# other. Lines are yielded as they arrive; only a bounded tail is retained.
+class RemoteCommand:
+    """Iterable remote exec yielding ("stdout" | "stderr", line) as output arrives."""
+
+    CHUNK_SIZE = 32768
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, ssh_client, cmd, timeout=None, cancel_event=None, max_lines=2000):
+        self.ssh_client = ssh_client
+        self.cmd = cmd
+        self.timeout = timeout
+        self.cancel_event = cancel_event or threading.Event()
+        self.tails = {"stdout": deque(maxlen=max_lines), "stderr": deque(maxlen=max_lines)}
+        self.dropped_lines = 0
+        self.exit_code = None
+        self.timed_out = False
+        self.cancelled = False
+
+    @property
+    def stdout(self):
+        return "\n".join(self.tails["stdout"]).strip()
+
+    @property
+    def stderr(self):
+        return "\n".join(self.tails["stderr"]).strip()
+
+    def cancel(self):
+        """Requests cancellation; safe to call from another thread."""
+        self.cancel_event.set()
+
+    def _keep(self, name, line):
+        tail = self.tails[name]
+        if tail.maxlen is not None and len(tail) == tail.maxlen:
+            self.dropped_lines += 1
+        tail.append(line)
+        return name, line
+
+    def __iter__(self):
+        started = time.perf_counter()
+        channel = self.ssh_client.get_transport().open_session()
+        decoders = {name: codecs.getincrementaldecoder("utf-8")(errors="replace") for name in self.tails}
+        pending = {name: "" for name in self.tails}
+        readers = {"stdout": (channel.recv_ready, channel.recv), "stderr": (channel.recv_stderr_ready, channel.recv_stderr)}
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        try:
+            channel.exec_command(self.cmd)
+            while True:
+                got_data = False
+                for name, (ready, recv) in readers.items():
+                    while ready():
+                        chunk = recv(self.CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        got_data = True
+                        *lines, pending[name] = (pending[name] + decoders[name].decode(chunk)).split("\n")
+                        for line in lines:
+                            yield self._keep(name, line.rstrip("\r"))
+                if (not got_data and channel.eof_received and channel.exit_status_ready()
+                        and not channel.recv_ready() and not channel.recv_stderr_ready()):
+                    break
+                if self.cancel_event.is_set():
+                    self.cancelled = True
+                    return
+                if deadline is not None and time.monotonic() > deadline:
+                    self.timed_out = True
+                    return
+                if not got_data:
+                    time.sleep(self.POLL_INTERVAL)
+            for name in self.tails:
+                rest = pending[name] + decoders[name].decode(b"", final=True)
+                if rest:
+                    yield self._keep(name, rest.rstrip("\r"))
+            self.exit_code = channel.recv_exit_status()
+        finally:
+            # Also runs when the consumer abandons the iterator (Streamlit rerun/stop)
+            channel.close()
+            outcome = ("timeout" if self.timed_out else "cancelled" if self.cancelled else
+                       "abandoned" if self.exit_code is None else "ok" if self.exit_code == 0 else "failed")
+            seconds = time.perf_counter() - started
+            observe("dcc_ssh_command_seconds", seconds, outcome=outcome)
+            record_call("ssh", f"{self.cmd[:80]} [{outcome}]", seconds)
+
+def render_streamed_command(ssh_client, cmd, timeout=None, visible_lines=200):
+    """Runs cmd while streaming its combined output tail into a placeholder; returns the RemoteCommand."""
+    command = RemoteCommand(ssh_client, cmd, timeout=timeout)
+    placeholder = st.empty()
+    shown = deque(maxlen=visible_lines)
+    hidden = 0
+    last_render = 0.0
+    for name, line in command:
+        hidden += len(shown) == visible_lines
+        shown.append(line if name == "stdout" else f"[stderr] {line}")
+        now = time.monotonic()
+        if now - last_render > 0.2:  # Throttle redraws; output can arrive faster than the browser paints
+            placeholder.code("\n".join(shown), language="bash")
+            last_render = now
+    placeholder.code("\n".join(shown) or "(no output)", language="bash")
+    if hidden:
+        st.caption(f"Only the last {visible_lines} lines are shown; {hidden} older lines were discarded.")
+    return command
+
+
+# --- Docker Inventory Cache ---
+# Per-host container and image listings parsed from `--format '{{json .}}'`
+# into typed records. A background `docker events` stream on the pooled
+# connection marks a listing stale only when something actually changed, so
+# widget interactions on an idle host are served from memory without an exec.
+@dataclass(frozen=True)
+class ContainerRecord:
+    id: str
+    name: str
+    image: str
+    state: str
+    status: str
+    ports: str
+    created: str
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data.get("ID", ""), data.get("Names", ""), data.get("Image", ""), data.get("State", ""),
+                   data.get("Status", ""), data.get("Ports", ""), data.get("CreatedAt", ""))
+
+@dataclass(frozen=True)
+class ImageRecord:
+    id: str
+    repository: str
+    tag: str
+    size: str
+    created: str
+
+    @property
+    def ref(self):
+        return f"{self.repository}:{self.tag}"
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data.get("ID", ""), data.get("Repository", ""), data.get("Tag", ""),
+                   data.get("Size", ""), data.get("CreatedSince", ""))
+
+def parse_json_lines(output, record_cls):
+    """Parses docker `{{json .}}` output, one object per line, skipping anything malformed."""
+    records = []
+    for line in (output or "").splitlines():
+        try:
+            records.append(record_cls.from_json(json.loads(line)))
+        except (ValueError, AttributeError):
+            continue
+    return records
+
+class DockerInventory:
+    """Cached container/image listing for one host, invalidated by `docker events`."""
+
+    CONTAINER_LIST_CMD = "docker ps -a --format '{{json .}}'"
+    EVENTS_RETRY_DELAY = 30  # seconds before retrying an events stream that failed to start
+    IMAGE_LIST_CMD = "docker images --format '{{json .}}'"
+    EVENTS_CMD = ("docker events --format '{{json .}}' --filter type=container --filter type=image"
+                  " --filter event=create --filter event=destroy --filter event=start --filter event=die"
+                  " --filter event=stop --filter event=rename --filter event=pause --filter event=unpause"
+                  " --filter event=pull --filter event=delete --filter event=tag --filter event=untag"
+                  " --filter event=import --filter event=load")
+
+    def __init__(self, get_client):
+        self._get_client = get_client
+        self._lock = threading.Lock()
+        self._records = {"containers": [], "images": []}
+        self._stale = {"containers": True, "images": True}
+        self._fetched_at = {"containers": None, "images": None}
+        self._events_thread = None
+        self._events_channel = None
+        self._events_failed_at = None
+        self.events_seen = 0
+
+    def _fetch(self, kind):
+        cmd, record_cls = ((self.CONTAINER_LIST_CMD, ContainerRecord) if kind == "containers"
+                           else (self.IMAGE_LIST_CMD, ImageRecord))
+        output, error, code = run_remote_command(self._get_client(), cmd)
+        if code != 0:
+            raise RuntimeError(error or f"`{cmd}` exited with {code}")
+        return parse_json_lines(output, record_cls)
+
+    def _get(self, kind, refresh):
+        self._ensure_events_stream()
+        with self._lock:
+            if not (refresh or self._stale[kind] or not self.watching):
+                record_cache(f"docker_{kind}", True)
+                return self._records[kind]
+            record_cache(f"docker_{kind}", False)
+            # Cleared before the fetch so an event arriving mid-fetch marks it stale again
+            self._stale[kind] = False
+        try:
+            records = self._fetch(kind)
+        except Exception:
+            with self._lock:
+                self._stale[kind] = True
+            raise
+        with self._lock:
+            self._records[kind] = records
+            self._fetched_at[kind] = time.time()
+        return records
+
+    def containers(self, refresh=False):
+        return self._get("containers", refresh)
+
+    def images(self, refresh=False):
+        return self._get("images", refresh)
+
+    def invalidate(self, kind=None):
+        with self._lock:
+            for k in ([kind] if kind else self._stale):
+                self._stale[k] = True
+
+    def fetched_at(self, kind):
+        return self._fetched_at[kind]
+
+    @property
+    def watching(self):
+        return self._events_thread is not None and self._events_thread.is_alive()
+
+    def _ensure_events_stream(self):
+        if self.watching:
+            return
+        if self._events_failed_at is not None and time.monotonic() - self._events_failed_at < self.EVENTS_RETRY_DELAY:
+            return
+        try:
+            _, stdout, _ = self._get_client().exec_command(self.EVENTS_CMD)
+        except Exception:
+            # Without a stream every read falls back to a fresh listing; retrying
+            # on every rerun would add an exec per read, so back off
+            self._events_failed_at = time.monotonic()
+            return
+        self._events_failed_at = None
+        self._events_channel = stdout.channel
+        self._events_thread = threading.Thread(target=self._consume_events, args=(stdout,),
+                                               name="docker-events", daemon=True)
+        self._events_thread.start()
+
+    def _consume_events(self, stdout):
+        try:
+            for line in stdout:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                kind = "images" if event.get("Type") == "image" else "containers"
+                with self._lock:
+                    self._stale[kind] = True
+                    if kind == "containers" and event.get("Action") == "destroy":
+                        # Removing containers can also free image references
+                        self._stale["images"] = True
+                    self.events_seen += 1
+        except Exception:
+            pass
+        finally:
+            self.invalidate()
+
+    def close(self):
+        if self._events_channel is not None:
+            self._events_channel.close()
+
+@st.cache_resource
+def get_docker_inventories():
+    """Process-wide registry of per-host Docker inventories."""
+    return {"lock": threading.Lock(), "hosts": {}}
+
+def get_docker_inventory(pool, host, user):
+    """Returns the shared inventory for (host, user), creating it on first use."""
+    registry = get_docker_inventories()
+    with registry["lock"]:
+        inventory = registry["hosts"].get((host, user))
+        if inventory is None:
+            # Reads whichever transport the pool holds for this host, never one session's password
+            inventory = registry["hosts"][(host, user)] = DockerInventory(functools.partial(pool.client, host, user))
+        return inventory
+
+def drop_docker_inventory(host, user):
+    """Stops the events stream and forgets the inventory for one host."""
+    registry = get_docker_inventories()
+    with registry["lock"]:
+        inventory = registry["hosts"].pop((host, user), None)
+    if inventory:
+        inventory.close()
+
+
+# --- Bulk Container Actions ---
+# Acting on many containers at once, either as a few batched `docker <action>
+# a b c ...` execs or as parallel per-container execs multiplexed over the
+# pooled transport. Batched mode still reports per-container results: docker
+# echoes each name it handled on stdout and names the failures on stderr.
+BULK_ACTION_COMMANDS = {"start": "docker start", "stop": "docker stop", "remove": "docker rm"}
+BULK_BATCH_SIZE = 200  # names per exec, keeps the remote command line well under ARG_MAX
+BULK_MAX_WORKERS = 8
+
+def filter_containers(containers, name_pattern="", images=(), states=()):
+    """Filters ContainerRecords by glob name pattern, image and state (empty filters match everything)."""
+    pattern = name_pattern.strip()
+    return [
+        c for c in containers
+        if (not pattern or fnmatch.fnmatch(c.name, pattern))
+        and (not images or c.image in images)
+        and (not states or c.state in states)
+    ]
+
+def bulk_container_action(ssh_client, action, names, parallel=False, max_workers=BULK_MAX_WORKERS):
+    """Runs one lifecycle action on many containers; returns one result dict per container."""
+    base_cmd = BULK_ACTION_COMMANDS[action]
+
+    def run_batch(batch):
+        start = time.perf_counter()
+        output, error, code = run_remote_command(ssh_client, f"{base_cmd} {' '.join(shlex.quote(n) for n in batch)}")
+        elapsed = round((time.perf_counter() - start) * 1000, 1)
+        done = set((output or "").splitlines())
+        error_lines = (error or "").splitlines()
+        results = []
+        for name in batch:
+            ok = name in done or (code == 0 and not error_lines)
+            message = "" if ok else next((l for l in error_lines if name in l), error or f"exit code {code}")
+            results.append({"Container": name, "Result": "✅ ok" if ok else "❌ failed",
+                            "Error": message, "Latency (ms)": elapsed})
+        return results
+
+    if parallel:
+        batches = [[name] for name in names]
+    else:
+        batches = [names[i:i + BULK_BATCH_SIZE] for i in range(0, len(names), BULK_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+        return [result for batch_results in executor.map(run_batch, batches) for result in batch_results]
+
+
+# --- Background Samplers ---
+# A daemon thread calls sample() every `interval` seconds and appends each
+# returned point to a fixed-size deque per series, so history survives reruns
+# while memory stays bounded. The script thread only copies the deques out.
+class RingBufferSampler:
+    """Base class for periodic background samplers backed by per-series ring buffers."""
+
+    def __init__(self, interval=5.0, history=120, name="sampler"):
+        self.interval = interval
+        self.history = history
+        self.name = name
+        self._lock = threading.Lock()
+        self._series = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.last_sample_at = None
+        self.samples_taken = 0
+
+    def sample(self):
+        """Returns {series_key: point_dict} for one tick. Implemented by subclasses."""
+        raise NotImplementedError
+
+    def _record(self, points):
+        now = time.time()
+        with self._lock:
+            for key, point in points.items():
+                buffer = self._series.get(key)
+                if buffer is None:
+                    buffer = self._series[key] = deque(maxlen=self.history)
+                buffer.append({"time": now, **point})
+            self.last_sample_at = now
+            self.samples_taken += 1
+
+    def prune(self, live_keys):
+        """Forgets series that are no longer reported (e.g. removed containers)."""
+        with self._lock:
+            for key in set(self._series) - set(live_keys):
+                del self._series[key]
+
+    def resize(self, history):
+        """Changes the ring buffer size, keeping the most recent points."""
+        with self._lock:
+            self.history = history
+            for key, buffer in self._series.items():
+                self._series[key] = deque(buffer, maxlen=history)
+
+    def _run(self, stop):
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                points = self.sample()
+                if stop.is_set():
+                    break  # stopped mid-sample; a restarted run may already be recording
+                self._record(points)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+            stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self.running:
+            return
+        # Each run gets its own stop event, so a thread still inside a slow
+        # sample() after stop() can never be revived by a quick restart
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def keys(self):
+        with self._lock:
+            return list(self._series)
+
+    def snapshot(self, keys=None):
+        """Copies the buffered points out as {key: [point, ...]}."""
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items() if keys is None or k in keys}
+
+
+# --- Remote Container Resource Monitor ---
+# Samples `docker stats --no-stream` on a background thread per host. Sizes
+# such as "12.5MiB / 1.9GiB" are converted to bytes so they can be charted.
+_SIZE_UNITS = {"b": 1, "kb": 1e3, "mb": 1e6, "gb": 1e9, "tb": 1e12,
+               "kib": 1024, "mib": 1024 ** 2, "gib": 1024 ** 3, "tib": 1024 ** 4}
+
+def parse_docker_size(text):
+    """Converts a docker size string like '1.5kB' or '12MiB' to bytes (0 when unparseable)."""
+    match = re.match(r"\s*([\d.]+)\s*([a-zA-Z]*)", text or "")
+    if not match:
+        return 0.0
+    return float(match.group(1)) * _SIZE_UNITS.get(match.group(2).lower() or "b", 1)
+
+def parse_docker_pair(text):
+    """Splits 'used / total' style docker stats fields into a pair of byte counts."""
+    left, _, right = (text or "").partition("/")
+    return parse_docker_size(left), parse_docker_size(right)
+
+class DockerStatsSampler(RingBufferSampler):
+    """Ring-buffered `docker stats` history for every container on one host."""
+
+    STATS_CMD = "docker stats --no-stream --format '{{json .}}'"
+
+    def __init__(self, get_client, interval=5.0, history=120):
+        super().__init__(interval, history, name="docker-stats")
+        self.get_client = get_client
+
+    def sample(self):
+        output, error, code = run_remote_command(self.get_client(), self.STATS_CMD, timeout=max(30, self.interval * 4))
+        if code != 0:
+            raise RuntimeError(error or f"docker stats exited with {code}")
+        points = {}
+        for line in (output or "").splitlines():
+            try:
+                data = json.loads(line)
+            except ValueError:
+                continue
+            mem_used, mem_limit = parse_docker_pair(data.get("MemUsage"))
+            net_rx, net_tx = parse_docker_pair(data.get("NetIO"))
+            block_read, block_write = parse_docker_pair(data.get("BlockIO"))
+            points[data.get("Name") or data.get("ID")] = {
+                "cpu_percent": float((data.get("CPUPerc") or "0").rstrip("%") or 0),
+                "mem_bytes": mem_used, "mem_limit": mem_limit,
+                "net_rx": net_rx, "net_tx": net_tx,
+                "block_read": block_read, "block_write": block_write,
+            }
+        self.prune(points)
+        return points
+
+@st.cache_resource
+def get_stats_samplers():
+    """Process-wide registry of per-host docker stats samplers."""
+    return {"lock": threading.Lock(), "hosts": {}}
+
+def get_stats_sampler(pool, host, user):
+    """Returns the (possibly not yet started) stats sampler for (host, user)."""
+    registry = get_stats_samplers()
+    with registry["lock"]:
+        sampler = registry["hosts"].get((host, user))
+        if sampler is None:
+            sampler = registry["hosts"][(host, user)] = DockerStatsSampler(functools.partial(pool.client, host, user))
+        return sampler
+
+def stop_stats_sampler(host, user):
+    """Stops and forgets the stats sampler for one host."""
+    registry = get_stats_samplers()
+    with registry["lock"]:
+        sampler = registry["hosts"].pop((host, user), None)
+    if sampler:
+        sampler.stop()
+
+def render_container_stats(sampler, containers):
+    """Charts the buffered docker stats history for the selected containers."""
+    pd = lazy_import("pandas")
+    px = lazy_import("plotly.express")
+    rows = [
+        {"Container": name, **point}
+        for name, points in sampler.snapshot(containers).items() for point in points
+    ]
+    if not rows:
+        st.info("Waiting for the first samples...")
+        return
+    df = pd.DataFrame(rows).sort_values("time")
+    df["Time"] = pd.to_datetime(df["time"], unit="s")
+    df["Memory (MiB)"] = df["mem_bytes"] / 1024 ** 2
+    # Network and block I/O are cumulative counters; chart them as per-second rates
+    elapsed = df.groupby("Container")["time"].diff()
+    for column, label in [("net_rx", "Net RX (KB/s)"), ("net_tx", "Net TX (KB/s)"),
+                          ("block_read", "Block Read (KB/s)"), ("block_write", "Block Write (KB/s)")]:
+        df[label] = (df.groupby("Container")[column].diff() / elapsed / 1e3).clip(lower=0)
+
+    col1, col2 = st.columns(2)
+    col1.plotly_chart(px.line(df, x="Time", y="cpu_percent", color="Container", title="CPU %"), use_container_width=True)
+    col2.plotly_chart(px.line(df, x="Time", y="Memory (MiB)", color="Container", title="Memory"), use_container_width=True)
+    net = df.melt(id_vars=["Time", "Container"], value_vars=["Net RX (KB/s)", "Net TX (KB/s)"])
+    block = df.melt(id_vars=["Time", "Container"], value_vars=["Block Read (KB/s)", "Block Write (KB/s)"])
+    col1.plotly_chart(px.line(net, x="Time", y="value", color="Container", line_dash="variable", title="Network I/O"), use_container_width=True)
+    col2.plotly_chart(px.line(block, x="Time", y="value", color="Container", line_dash="variable", title="Block I/O"), use_container_width=True)
+
+
+# --- Local System Sampler ---
+# One process-wide sampler for the machine running the app. psutil's
+# non-blocking counters are read once per tick (cpu_percent without an
+# interval measures since the previous call), so the System Monitor page only
+# copies ring buffers out and never blocks a rerun. The same tick scans the
+# process table: per-process CPU and I/O rates are deltas against the previous
+# tick, and the table is replaced wholesale so exited processes drop out.
+PROCESS_SORT_COLUMNS = {"CPU": "CPU %", "Memory (RSS)": "RSS (MiB)", "I/O": "I/O (KB/s)", "Open files": "Open files"}
+
+@functools.lru_cache(maxsize=1024)
+def uid_to_user(uid):
+    """User name for a uid, cached; psutil's username() does this lookup for every process."""
+    try:
+        import pwd
+        return pwd.getpwuid(uid).pw_name
+    except (ImportError, KeyError):
+        return str(uid)
+
+class HostStatsSampler(RingBufferSampler):
+    """Per-core CPU, memory, swap, disk I/O and network counters for the local host."""
+
+    PROCESS_ATTRS = ["pid", "name", "uids", "create_time", "cpu_times", "memory_info", "io_counters", "num_fds"]
+    PROCESS_VIEW_TIMEOUT = 15  # seconds scanning continues after the table was last rendered
+
+    def __init__(self, interval=1.0, history=300):
+        super().__init__(interval, history, name="host-stats")
+        self.process_interval = 5.0  # a full scan costs ~0.1 ms per process, so it runs slower than the counters
+        self.process_scan_seconds = None
+        self._process_viewed_at = None
+        self._processes = []
+        self._process_totals = {}
+        self._process_scanned_at = None
+
+    def start(self):
+        # Prime the CPU counters so the first real tick has something to diff against
+        lazy_import("psutil").cpu_percent(percpu=True)
+        super().start()
+
+    def sample(self):
+        psutil = lazy_import("psutil")
+        cores = psutil.cpu_percent(percpu=True)
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        points = {
+            "cpu": {"percent": sum(cores) / len(cores) if cores else 0.0,
+                    **{f"core{i}": value for i, value in enumerate(cores)}},
+            "memory": {"percent": memory.percent, "used": memory.used, "available": memory.available,
+                       "total": memory.total},
+            "swap": {"percent": swap.percent, "used": swap.used, "total": swap.total},
+            "disk": {"percent": psutil.disk_usage("/").percent},
+        }
+        disk_io = psutil.disk_io_counters()
+        if disk_io is not None:
+            points["disk"].update(read_bytes=disk_io.read_bytes, write_bytes=disk_io.write_bytes,
+                                  read_count=disk_io.read_count, write_count=disk_io.write_count)
+        net = psutil.net_io_counters()
+        if net is not None:
+            points["net"] = {"bytes_sent": net.bytes_sent, "bytes_recv": net.bytes_recv,
+                             "packets_sent": net.packets_sent, "packets_recv": net.packets_recv}
+        if self.tracking_processes:
+            if self._process_scanned_at is None or time.monotonic() - self._process_scanned_at >= self.process_interval:
+                self._scan_processes(psutil)
+        elif self._process_scanned_at is not None:
+            with self._lock:
+                self._processes = []
+            self._process_totals, self._process_scanned_at = {}, None
+        return points
+
+    def watch_processes(self):
+        """Marks the process table as on screen; scans stop soon after nobody renders it."""
+        self._process_viewed_at = time.monotonic()
+
+    @property
+    def tracking_processes(self):
+        timeout = max(self.PROCESS_VIEW_TIMEOUT, 3 * self.process_interval)
+        return self._process_viewed_at is not None and time.monotonic() - self._process_viewed_at < timeout
+
+    def _scan_processes(self, psutil):
+        started = time.perf_counter()
+        now = time.monotonic()
+        elapsed = now - self._process_scanned_at if self._process_scanned_at else None
+        # uids/num_fds are Unix-only and io_counters is missing on macOS; process_iter
+        # reuses Process objects between calls and reads each one's attrs in one oneshot()
+        attrs = [a for a in self.PROCESS_ATTRS if hasattr(psutil.Process, a)]
+        if "uids" not in attrs:
+            attrs.append("username")
+        rows, totals = [], {}
+        for proc in psutil.process_iter(attrs=attrs, ad_value=None):
+            info = proc.info
+            cpu, io, memory = info["cpu_times"], info.get("io_counters"), info["memory_info"]
+            key = (info["pid"], info["create_time"])
+            cpu_total = cpu.user + cpu.system if cpu else None
+            io_total = io.read_bytes + io.write_bytes if io else None
+            totals[key] = (cpu_total, io_total)
+            previous = self._process_totals.get(key)
+            cpu_rate = io_rate = None
+            if previous and elapsed:
+                if cpu_total is not None and previous[0] is not None:
+                    cpu_rate = round(100 * (cpu_total - previous[0]) / elapsed, 1)
+                if io_total is not None and previous[1] is not None:
+                    io_rate = round((io_total - previous[1]) / elapsed / 1e3, 1)
+            user = uid_to_user(info["uids"].real) if info.get("uids") else info.get("username")
+            rows.append({"PID": info["pid"], "Name": info["name"], "User": user,
+                         "CPU %": cpu_rate, "RSS (MiB)": round(memory.rss / 1024 ** 2, 1) if memory else None,
+                         "I/O (KB/s)": io_rate, "Open files": info.get("num_fds")})
+        with self._lock:
+            self._processes = rows
+        self._process_totals = totals
+        self._process_scanned_at = now
+        self.process_scan_seconds = time.perf_counter() - started
+
+    def top_processes(self, n, column="CPU %"):
+        """Returns (the n rows with the largest value in column, total process count) from the latest scan."""
+        with self._lock:
+            rows = self._processes
+        return heapq.nlargest(n, rows, key=lambda row: row[column] if row[column] is not None else -1), len(rows)
+
+    def latest(self, key):
+        """The most recent point for one series, or None before the first tick."""
+        with self._lock:
+            buffer = self._series.get(key)
+            return buffer[-1] if buffer else None
+
+@st.cache_resource(show_spinner=False)
+def get_host_sampler():
+    """Process-wide local host sampler shared by every session."""
+    return HostStatsSampler()
+
+def collect_host_metrics():
+    """Exports the host sampler's latest tick; nothing is measured at scrape time."""
+    sampler = get_host_sampler()
+    cpu, memory, swap, disk, net = (sampler.latest(k) for k in ("cpu", "memory", "swap", "disk", "net"))
+    if cpu is None:
+        return
+    yield "dcc_host_cpu_percent", "gauge", "Host CPU utilisation by core.", [({"core": "all"}, cpu["percent"])] + [
+        ({"core": key[4:]}, value) for key, value in cpu.items() if key.startswith("core")]
+    yield "dcc_host_memory_bytes", "gauge", "Host memory.", [
+        ({"state": state}, memory[state]) for state in ("used", "available", "total")]
+    yield "dcc_host_swap_bytes", "gauge", "Host swap.", [({"state": state}, swap[state]) for state in ("used", "total")]
+    yield "dcc_host_root_disk_usage_percent", "gauge", "Usage of the root filesystem.", [({}, disk["percent"])]
+    if "read_bytes" in disk:
+        yield "dcc_host_disk_io_bytes", "counter", "Host disk I/O.", [
+            ({"direction": "read"}, disk["read_bytes"]), ({"direction": "write"}, disk["write_bytes"])]
+    if net:
+        yield "dcc_host_network_bytes", "counter", "Host network I/O.", [
+            ({"direction": "received"}, net["bytes_recv"]), ({"direction": "sent"}, net["bytes_sent"])]
+    if sampler.process_scan_seconds is not None:
+        yield "dcc_host_process_scan_seconds", "gauge", "Duration of the last process table scan.", [
+            ({}, sampler.process_scan_seconds)]
+
+def render_host_stats(sampler):
+    """Current gauges plus buffered history charts for the local host."""
+    cpu, memory, swap, disk = (sampler.latest(k) for k in ("cpu", "memory", "swap", "disk"))
+    if cpu is None:
+        st.info("Waiting for the first samples...")
+        return
+    col1, col2, col3, col4 = st.columns(4)
+    for col, title, point in [(col1, "CPU", cpu), (col2, "Memory", memory), (col3, "Swap", swap), (col4, "Disk", disk)]:
+        with col:
+            st.subheader(title)
+            st.metric("Usage", f"{point['percent']:.1f}%")
+            st.progress(min(point["percent"], 100.0) / 100)
+
+    pd = lazy_import("pandas")
+    px = lazy_import("plotly.express")
+    history = sampler.snapshot(["cpu", "memory", "swap", "disk", "net"])
+
+    def frame(key):
+        df = pd.DataFrame(history.get(key, []))
+        if not df.empty:
+            df["Time"] = pd.to_datetime(df["time"], unit="s")
+        return df
+
+    def rates(df, columns):
+        # Cumulative counters are charted as per-second rates
+        elapsed = df["time"].diff()
+        return pd.DataFrame({"Time": df["Time"],
+                             **{label: (df[column].diff() / elapsed / 1e3).clip(lower=0) for column, label in columns}})
+
+    col1, col2 = st.columns(2)
+    cpu_df = frame("cpu")
+    col1.plotly_chart(px.line(cpu_df, x="Time", y="percent", title="CPU % (all cores)"), use_container_width=True)
+    cores = pd.DataFrame({"Core": [k for k in cpu if k.startswith("core")],
+                          "CPU %": [v for k, v in cpu.items() if k.startswith("core")]})
+    col2.plotly_chart(px.bar(cores, x="Core", y="CPU %", range_y=[0, 100], title="Per-core CPU % (latest)"), use_container_width=True)
+
+    usage = pd.concat([frame("memory").assign(Series="Memory"), frame("swap").assign(Series="Swap")])
+    col1.plotly_chart(px.line(usage, x="Time", y="percent", color="Series", title="Memory & Swap %"), use_container_width=True)
+    disk_df = frame("disk")
+    if "read_bytes" in disk_df:
+        disk_rates = rates(disk_df, [("read_bytes", "Read (KB/s)"), ("write_bytes", "Write (KB/s)")])
+        col2.plotly_chart(px.line(disk_rates.melt(id_vars="Time"), x="Time", y="value", color="variable", title="Disk I/O"), use_container_width=True)
+    net_df = frame("net")
+    if not net_df.empty:
+        net_rates = rates(net_df, [("bytes_recv", "RX (KB/s)"), ("bytes_sent", "TX (KB/s)")])
+        col1.plotly_chart(px.line(net_rates.melt(id_vars="Time"), x="Time", y="value", color="variable", title="Network I/O"), use_container_width=True)
+
+
+# --- Kubernetes Informer Cache ---
+# Mirrors the client-go informer pattern: one full list per resource type,
+# then a long-running watch applies ADDED/MODIFIED/DELETED events to an
+# in-memory index keyed by (namespace, name). Every session reads from the same
+# index, so dashboard interactions never hit the API server. Objects are
+# projected to the few fields the dashboard shows before they are stored.
+def _pod_row(p):
+    return {"Namespace": p.metadata.namespace, "Name": p.metadata.name, "Status": p.status.phase,
+            "Node": p.spec.node_name, "IP": p.status.pod_ip}
+
+def _deployment_row(d):
+    return {"Namespace": d.metadata.namespace, "Name": d.metadata.name, "Replicas": d.spec.replicas,
+            "Available": d.status.available_replicas or 0}
+
+def _service_row(s):
+    return {"Namespace": s.metadata.namespace, "Name": s.metadata.name, "Type": s.spec.type,
+            "Cluster IP": s.spec.cluster_ip, "Ports": str(s.spec.ports)}
+
+def _node_row(n):
+    conditions = n.status.conditions or []
+    allocatable = n.status.allocatable or {}
+    return {"Namespace": "", "Name": n.metadata.name,
+            "Status": conditions[-1].type if conditions else "Unknown",
+            "Kubelet Version": n.status.node_info.kubelet_version,
+            "Pressure": ", ".join(c.type for c in conditions if c.type.endswith("Pressure") and c.status == "True"),
+            "Allocatable CPU": allocatable.get("cpu", ""), "Allocatable Memory": allocatable.get("memory", "")}
+
+KUBE_RESOURCES = {
+    # kind: (api attribute, all-namespaces list method, row projection)
+    "pods": ("core", "list_pod_for_all_namespaces", _pod_row),
+    "deployments": ("apps", "list_deployment_for_all_namespaces", _deployment_row),
+    "services": ("core", "list_service_for_all_namespaces", _service_row),
+    "nodes": ("core", "list_node", _node_row),
+}
+
+class ResourceInformer:
+    """List-then-watch cache of one Kubernetes resource type, indexed by namespace and name."""
+
+    WATCH_TIMEOUT = 300  # server-side watch timeout; the loop simply re-watches
+    RETRY_DELAY = 5
+    PAGE_SIZE = 500  # initial list is chunked so the apiserver never builds one huge response
+
+    def __init__(self, kind, list_fn, project):
+        self.kind = kind
+        self.list_fn = list_fn
+        self.project = project
+        self._lock = threading.Lock()
+        self._by_namespace = {}  # namespace: {name: row}
+        self._resource_version = None
+        self._stop = threading.Event()
+        self.synced = threading.Event()
+        self.last_error = None
+        self.events_seen = 0
+        self.lists_done = 0
+        self._thread = threading.Thread(target=self._run, name=f"informer-{kind}", daemon=True)
+
+    def start(self):
+        if not self._thread.is_alive():
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _relist(self):
+        index = {}
+        continue_token = None
+        while True:
+            kwargs = {"limit": self.PAGE_SIZE}
+            if continue_token:
+                kwargs["_continue"] = continue_token
+            result = self.list_fn(**kwargs)
+            for obj in result.items:
+                row = self.project(obj)
+                index.setdefault(row["Namespace"], {})[row["Name"]] = row
+            continue_token = result.metadata._continue
+            if not continue_token:
+                break
+        with self._lock:
+            self._by_namespace = index
+            self._resource_version = result.metadata.resource_version
+        self.lists_done += 1
+        self.synced.set()
+
+    def _apply(self, event_type, obj):
+        row = self.project(obj)
+        with self._lock:
+            bucket = self._by_namespace.setdefault(row["Namespace"], {})
+            if event_type == "DELETED":
+                bucket.pop(row["Name"], None)
+                if not bucket:
+                    del self._by_namespace[row["Namespace"]]
+            else:
+                bucket[row["Name"]] = row
+            self._resource_version = obj.metadata.resource_version
+        self.events_seen += 1
+
+    def _run(self):
+        watch = lazy_import("kubernetes.watch")
+        ApiException = lazy_import("kubernetes.client.rest").ApiException
+        while not self._stop.is_set():
+            try:
+                if self._resource_version is None:
+                    self._relist()
+                stream = watch.Watch().stream(self.list_fn, resource_version=self._resource_version,
+                                              timeout_seconds=self.WATCH_TIMEOUT)
+                for event in stream:
+                    if self._stop.is_set():
+                        return
+                    if event["type"] == "ERROR":
+                        # Usually 410 Gone: our resourceVersion is too old, so relist
+                        self._resource_version = None
+                        break
+                    self._apply(event["type"], event["object"])
+                self.last_error = None
+            except ApiException as e:
+                if e.status == 410:
+                    self._resource_version = None
+                    continue
+                self.last_error = f"{e.status}: {e.reason}"
+                self._stop.wait(self.RETRY_DELAY)
+            except Exception as e:
+                self.last_error = str(e)
+                self._resource_version = None
+                self._stop.wait(self.RETRY_DELAY)
+
+    def wait_synced(self, timeout=10):
+        return self.synced.wait(timeout)
+
+    def namespaces(self):
+        with self._lock:
+            return sorted(self._by_namespace)
+
+    def list(self, namespace=None):
+        """Rows for one namespace, or for every namespace when namespace is None."""
+        with self._lock:
+            if namespace is not None:
+                return list(self._by_namespace.get(namespace, {}).values())
+            return [row for bucket in self._by_namespace.values() for row in bucket.values()]
+
+    def get(self, namespace, name):
+        with self._lock:
+            return self._by_namespace.get(namespace, {}).get(name)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(bucket) for bucket in self._by_namespace.values())
+
+@st.cache_resource
+def get_kube_clients():
+    """Loads kubeconfig once per process and returns the shared API clients."""
+    kubernetes = lazy_import("kubernetes")
+    kubernetes.config.load_kube_config()
+    api_client = kubernetes.client.ApiClient()
+    request = api_client.rest_client.request
+
+    def timed_request(method, url, *args, **kwargs):
+        # Every typed and raw call funnels through the REST client, whichever
+        # client generation is installed; newer ones put the query in the URL
+        watching = (any(key == "watch" for key, _ in kwargs.get("query_params") or [])
+                    or "watch=true" in urlparse(url).query)
+        verb = "WATCH" if watching else method
+        with timed_call("kubernetes", f"{verb} {urlparse(url).path}", "dcc_kubernetes_api_seconds", verb=verb):
+            return request(method, url, *args, **kwargs)
+
+    api_client.rest_client.request = timed_request
+    return {"api_client": api_client, "core": kubernetes.client.CoreV1Api(api_client),
+            "apps": kubernetes.client.AppsV1Api(api_client),
+            "custom": kubernetes.client.CustomObjectsApi(api_client)}
+
+@st.cache_resource
+def get_informers():
+    """Process-wide informer registry; informers start on first use."""
+    return {"lock": threading.Lock(), "kinds": {}}
+
+def get_informer(kind):
+    """Returns the running informer for one resource type, starting it if needed."""
+    registry = get_informers()
+    with registry["lock"]:
+        informer = registry["kinds"].get(kind)
+        if informer is None:
+            api_name, list_method, project = KUBE_RESOURCES[kind]
+            list_fn = getattr(get_kube_clients()[api_name], list_method)
+            informer = registry["kinds"][kind] = ResourceInformer(kind, list_fn, project).start()
+        return informer
+
+
+# --- Kubernetes Paginated Queries ---
+# Live, selector-driven listings for views the informer cache cannot answer
+# (label/field selectors). Pages are fetched with limit/continue and asked for
+# in the server-side Table format, so the apiserver sends only the printed
+# columns instead of full object specs. Servers that do not return a Table fall
+# back to the typed list call with the same pagination, projected client-side.
+KUBE_TABLE_ACCEPT = "application/json;as=Table;v=v1;g=meta.k8s.io, application/json"
+
+class KubeTableUnsupported(Exception):
+    """Raised when the apiserver answers a Table request with something other than a Table."""
+
+KUBE_RESOURCE_PATHS = {
+    # kind: (API prefix, namespaced)
+    "pods": ("/api/v1", True),
+    "deployments": ("/apis/apps/v1", True),
+    "services": ("/api/v1", True),
+    "nodes": ("/api/v1", False),
+}
+
+def kube_resource_path(kind, namespace=None):
+    prefix, namespaced = KUBE_RESOURCE_PATHS[kind]
+    if namespaced and namespace:
+        return f"{prefix}/namespaces/{namespace}/{kind}"
+    return f"{prefix}/{kind}"
+
+def kube_get_raw(api_client, path, query_params, accept):
+    """GETs an API path with the client's auth and returns the raw body; raises ApiException on HTTP errors."""
+    if not hasattr(api_client, "param_serialize"):
+        return api_client.call_api(
+            path, "GET", query_params=query_params, header_params={"Accept": accept},
+            auth_settings=["BearerToken"], _preload_content=False, _return_http_data_only=True,
+        ).data
+    # Newer generated clients split building the request from sending it, and
+    # leave status handling to the typed deserializer we are bypassing
+    request = api_client.param_serialize(method="GET", resource_path=path, query_params=query_params,
+                                         header_params={"Accept": accept}, auth_settings=["BearerToken"])
+    response = api_client.call_api(*request)
+    response.read()
+    if not 200 <= response.status <= 299:
+        raise lazy_import("kubernetes.client.rest").ApiException(http_resp=response)
+    return response.data
+
+def iter_kube_table_pages(api_client, kind, namespace=None, label_selector="", field_selector="", limit=500):
+    """Yields one list of row dicts per page of a server-side Table listing."""
+    # Row objects are only needed to tell namespaces apart in a cross-namespace listing
+    namespaced = KUBE_RESOURCE_PATHS[kind][1]
+    include_object = "Metadata" if namespaced and not namespace else "None"
+    query = [("limit", limit), ("includeObject", include_object)]
+    if label_selector:
+        query.append(("labelSelector", label_selector))
+    if field_selector:
+        query.append(("fieldSelector", field_selector))
+    continue_token = None
+    while True:
+        params = query + ([("continue", continue_token)] if continue_token else [])
+        try:
+            data = kube_get_raw(api_client, kube_resource_path(kind, namespace), params, KUBE_TABLE_ACCEPT)
+        except lazy_import("kubernetes.client.rest").ApiException as e:
+            if e.status == 406:
+                raise KubeTableUnsupported("Server refused the Table format") from e
+            raise
+        body = json.loads(data)
+        if body.get("kind") != "Table":
+            raise KubeTableUnsupported(f"Server returned {body.get('kind') or 'an unknown kind'} instead of a Table")
+        columns = [c["name"] for c in body.get("columnDefinitions", [])]
+        rows = []
+        for row in body.get("rows", []):
+            record = {"Namespace": (row.get("object") or {}).get("metadata", {}).get("namespace", namespace or "")}
+            record.update(zip(columns, row.get("cells", [])))
+            rows.append(record)
+        yield rows
+        continue_token = body.get("metadata", {}).get("continue")
+        if not continue_token:
+            return
+
+def iter_kube_list_pages(kind, namespace=None, label_selector="", field_selector="", limit=500):
+    """Typed-list fallback for iter_kube_table_pages: same pages, projected client-side."""
+    api_name, list_method, project = KUBE_RESOURCES[kind]
+    api = get_kube_clients()[api_name]
+    if namespace and KUBE_RESOURCE_PATHS[kind][1]:
+        list_fn = getattr(api, list_method.replace("_for_all_namespaces", "").replace("list_", "list_namespaced_"))
+        list_fn = functools.partial(list_fn, namespace)
+    else:
+        list_fn = getattr(api, list_method)
+    continue_token = None
+    while True:
+        kwargs = {"limit": limit, "label_selector": label_selector, "field_selector": field_selector}
+        if continue_token:
+            kwargs["_continue"] = continue_token
+        result = list_fn(**kwargs)
+        yield [project(obj) for obj in result.items]
+        continue_token = result.metadata._continue
+        if not continue_token:
+            return
+
+def iter_kube_pages(kind, namespace=None, label_selector="", field_selector="", limit=500):
+    """Pages of rows using Table projection when the server supports it."""
+    try:
+        pages = iter_kube_table_pages(get_kube_clients()["api_client"], kind, namespace,
+                                      label_selector, field_selector, limit)
+        first = next(pages, [])
+    except KubeTableUnsupported:
+        yield from iter_kube_list_pages(kind, namespace, label_selector, field_selector, limit)
+        return
+    yield first
+    yield from pages
+
+
+# --- Kubernetes Resource Metrics ---
+# Samples the metrics.k8s.io node and pod usage endpoints on a background
+# thread into bounded per-object histories, so the dashboard can rank top
+# consumers and spot hot nodes without an API call per click. The endpoints
+# are reached through the shared ApiClient, so pointing kubeconfig at a local
+# fake apiserver is enough to exercise it.
+def parse_kube_quantity(value):
+    """Converts a Kubernetes quantity ('250m', '1Gi', '12345n') to a float in base units."""
+    return float(lazy_import("kubernetes.utils").parse_quantity(value or "0"))
+
+class KubeMetricsSampler(RingBufferSampler):
+    """Ring-buffered node and pod usage from the metrics API."""
+
+    def __init__(self, interval=15.0, history=60):
+        super().__init__(interval, history, name="kube-metrics")
+
+    def sample(self):
+        custom = get_kube_clients()["custom"]
+        nodes = custom.list_cluster_custom_object("metrics.k8s.io", "v1beta1", "nodes")
+        pods = custom.list_cluster_custom_object("metrics.k8s.io", "v1beta1", "pods")
+        points = {}
+        for item in nodes.get("items", []):
+            usage = item.get("usage", {})
+            points[("node", item["metadata"]["name"])] = {
+                "cpu_millicores": parse_kube_quantity(usage.get("cpu")) * 1000,
+                "memory_bytes": parse_kube_quantity(usage.get("memory")),
+            }
+        for item in pods.get("items", []):
+            containers = item.get("containers", [])
+            metadata = item["metadata"]
+            points[("pod", f"{metadata.get('namespace', '')}/{metadata['name']}")] = {
+                "cpu_millicores": sum(parse_kube_quantity(c.get("usage", {}).get("cpu")) for c in containers) * 1000,
+                "memory_bytes": sum(parse_kube_quantity(c.get("usage", {}).get("memory")) for c in containers),
+            }
+        self.prune(points)
+        return points
+
+    def latest(self, kind):
+        """Most recent point per object of one kind ('node' or 'pod')."""
+        return {
+            name: points[-1]
+            for (key_kind, name), points in self.snapshot().items() if key_kind == kind and points
+        }
+
+    def top(self, kind, field, n):
+        """The n objects of one kind with the highest latest `field`, as (name, point) pairs, highest first."""
+        return heapq.nlargest(n, self.latest(kind).items(), key=lambda item: item[1][field])
+
+@st.cache_resource
+def get_kube_metrics_sampler():
+    """Process-wide metrics sampler; started from the dashboard on demand."""
+    return KubeMetricsSampler()
+
+
+# --- Kubernetes Bulk Apply ---
+# Applies uploaded multi-document YAML concurrently: each object is created,
+# or patched when it already exists, on a bounded thread pool. Conflicts and
+# throttling responses are retried with exponential backoff; every object
+# yields its own status row as soon as it finishes.
+KUBE_APPLY_KINDS = {
+    # kind: (api, create method, patch method)
+    "Pod": ("core", "create_namespaced_pod", "patch_namespaced_pod"),
+    "Deployment": ("apps", "create_namespaced_deployment", "patch_namespaced_deployment"),
+    "Service": ("core", "create_namespaced_service", "patch_namespaced_service"),
+}
+KUBE_APPLY_RETRIES = 5
+KUBE_RETRYABLE_STATUSES = {409, 429, 500, 503, 504}
+
+def load_manifests(text):
+    """Parses multi-document YAML into manifests, flattening `kind: List` documents."""
+    yaml = lazy_import("yaml")
+    manifests = []
+    for doc in yaml.safe_load_all(text):
+        if not doc:
+            continue
+        if doc.get("kind") == "List":
+            manifests.extend(item for item in doc.get("items", []) if item)
+        else:
+            manifests.append(doc)
+    return manifests
+
+def apply_manifest(manifest, default_namespace="default", dry_run=False, retries=KUBE_APPLY_RETRIES):
+    """Creates or patches one object; returns a status dict and never raises."""
+    ApiException = lazy_import("kubernetes.client.rest").ApiException
+    kind = manifest.get("kind", "?")
+    metadata = manifest.get("metadata") or {}
+    namespace = metadata.get("namespace") or default_namespace
+    result = {"Kind": kind, "Namespace": namespace, "Name": metadata.get("name", "?"),
+              "Result": "", "Attempts": 0, "Error": ""}
+    if kind not in KUBE_APPLY_KINDS:
+        result.update(Result="⏭️ skipped", Error=f"Unsupported kind (supported: {', '.join(KUBE_APPLY_KINDS)})")
+        return result
+    api_name, create_method, patch_method = KUBE_APPLY_KINDS[kind]
+    api = get_kube_clients()[api_name]
+    extra = {"dry_run": "All"} if dry_run else {}
+    action = "create"
+    for attempt in range(1, retries + 1):
+        result["Attempts"] = attempt
+        try:
+            if action == "create":
+                getattr(api, create_method)(namespace=namespace, body=manifest, **extra)
+                result["Result"] = "✅ created"
+            else:
+                getattr(api, patch_method)(name=result["Name"], namespace=namespace, body=manifest, **extra)
+                result["Result"] = "✅ patched"
+            return result
+        except ApiException as e:
+            if action == "create" and e.status == 409:
+                action = "patch"  # AlreadyExists: switch to patch straight away, no backoff
+                continue
+            if e.status not in KUBE_RETRYABLE_STATUSES or attempt == retries:
+                result.update(Result="❌ failed", Error=f"{e.status} {e.reason}: {e.body or ''}"[:500])
+                return result
+            time.sleep(min(8.0, 0.25 * 2 ** (attempt - 1)) * (0.5 + random.random()))
+        except Exception as e:
+            result.update(Result="❌ failed", Error=str(e))
+            return result
+    result.update(Result="❌ failed", Error="Retries exhausted")
+    return result
+
+def apply_manifests(manifests, default_namespace="default", max_workers=8, dry_run=False):
+    """Applies manifests concurrently; yields each object's status dict as it completes."""
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(apply_manifest, m, default_namespace, dry_run) for m in manifests]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# --- GitHub API Client ---
+# One pooled requests.Session shared by every session: keep-alive connections,
+# connect/read timeouts, retry with backoff for idempotent calls, conditional
+# GETs against a bounded ETag cache (a 304 is free against the rate limit) and
+# waiting out X-RateLimit-* / Retry-After limits when the wait is short.
+# GITHUB_API_URL overrides the base URL, e.g. to point at a local fake server.
+class GitHubRateLimitError(Exception):
+    """Raised when GitHub's rate limit would need a longer wait than allowed."""
+
+class GitHubClient:
+    """Pooled, rate-limit-aware GitHub REST client with an ETag response cache."""
+
+    TIMEOUT = (5, 30)  # (connect, read) seconds
+    POOL_SIZE = 20
+    CACHE_SIZE = 512
+    MAX_RATE_LIMIT_WAIT = 60  # seconds we are willing to block for a reset
+
+    def __init__(self, base_url=None):
+        requests = lazy_import("requests")
+        Retry = lazy_import("urllib3.util.retry").Retry
+        self.base_url = (base_url or os.environ.get("GITHUB_API_URL") or "https://api.github.com").rstrip("/")
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                      allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}),
+                      # send() owns rate-limit waits and caps them at MAX_RATE_LIMIT_WAIT; urllib3
+                      # would otherwise sleep out any Retry-After on a 429/503, up to six hours
+                      respect_retry_after_header=False, raise_on_status=False)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.POOL_SIZE, pool_maxsize=self.POOL_SIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept": "application/vnd.github.v3+json", "User-Agent": "dev-control-center"})
+        self._cache = OrderedDict()  # (auth hash, url): (etag, body)
+        self._lock = threading.Lock()
+        self.rate_limits = {}  # auth hash: last seen X-RateLimit-* values
+        self.stats = {"requests": 0, "cache_hits": 0, "rate_limit_waits": 0}
+
+    def url(self, path_or_url):
+        return path_or_url if path_or_url.startswith("http") else f"{self.base_url}/{path_or_url.lstrip('/')}"
+
+    @staticmethod
+    def _auth_hash(headers):
+        return hashlib.sha256((headers or {}).get("Authorization", "").encode()).hexdigest()
+
+    def _cache_key(self, url, headers):
+        return self._auth_hash(headers), url
+
+    def rate_limit(self, headers):
+        """Last rate-limit state seen for the token in these headers (empty if unknown)."""
+        with self._lock:
+            return self.rate_limits.get(self._auth_hash(headers), {})
+
+    def _record_rate_limit(self, response, auth_hash):
+        headers = response.headers
+        if "X-RateLimit-Remaining" in headers:
+            with self._lock:
+                self.rate_limits[auth_hash] = {
+                    "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                    "remaining": int(headers["X-RateLimit-Remaining"]),
+                    "reset": int(headers.get("X-RateLimit-Reset", 0)),
+                }
+
+    def _rate_limit_wait(self, response):
+        """Seconds to wait before retrying a rate-limited response, or None if not rate limited."""
+        if response.status_code not in (403, 429):
+            return None
+        if "Retry-After" in response.headers:
+            return float(response.headers["Retry-After"])
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            return max(0.0, int(response.headers.get("X-RateLimit-Reset", 0)) - time.time()) + 1
+        return None
+
+    def send(self, method, path_or_url, headers=None, json=None, params=None):
+        """Sends one request and returns the response, using the ETag cache for GETs."""
+        url = self.url(path_or_url)
+        headers = dict(headers or {})
+        cache_key = self._cache_key(url + ("?" + str(sorted(params.items())) if params else ""), headers)
+        cached = None
+        if method == "GET":
+            with self._lock:
+                cached = self._cache.get(cache_key)
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+        for _ in range(2):  # at most one rate-limit wait
+            self.stats["requests"] += 1
+            started = time.perf_counter()
+            response = self.session.request(method, url, headers=headers, json=json, params=params, timeout=self.TIMEOUT)
+            seconds = time.perf_counter() - started
+            observe("dcc_github_request_seconds", seconds, method=method)
+            record_call("github", f"{method} {urlparse(url).path}", seconds)
+            self._record_rate_limit(response, cache_key[0])
+            wait = self._rate_limit_wait(response)
+            if wait is None:
+                break
+            if wait > self.MAX_RATE_LIMIT_WAIT:
+                raise GitHubRateLimitError(f"GitHub rate limit exceeded; resets in {wait:.0f}s")
+            self.stats["rate_limit_waits"] += 1
+            time.sleep(wait)
+
+        if method == "GET":
+            hit = response.status_code == 304 and cached
+            record_cache("github_etag", hit)
+            if hit:
+                self.stats["cache_hits"] += 1
+                with self._lock:
+                    self._cache.move_to_end(cache_key)
+                response._content = cached[1]
+                response.status_code = 200
+            elif response.ok and response.headers.get("ETag"):
+                with self._lock:
+                    self._cache[cache_key] = (response.headers["ETag"], response.content)
+                    self._cache.move_to_end(cache_key)
+                    while len(self._cache) > self.CACHE_SIZE:
+                        self._cache.popitem(last=False)
+        elif response.ok:
+            # Writes can change anything we listed before; drop this token's cached pages
+            with self._lock:
+                for key in [k for k in self._cache if k[0] == cache_key[0]]:
+                    del self._cache[key]
+        return response
+
+    def request(self, method, path_or_url, headers=None, json=None, params=None):
+        """Returns (True, parsed JSON) on success or (False, error message) on failure."""
+        requests = lazy_import("requests")
+        try:
+            response = self.send(method, path_or_url, headers=headers, json=json, params=params)
+        except GitHubRateLimitError as e:
+            return False, str(e)
+        except requests.exceptions.RequestException as e:
+            return False, f"Request failed: {e}"
+        if not response.ok:
+            try:
+                return False, response.json().get("message", response.text)
+            except ValueError:
+                return False, response.text or f"HTTP {response.status_code}"
+        return (True, response.json()) if response.content else (True, {})
+
+    def get_all_pages(self, path, headers=None, params=None, max_workers=8):
+        """Fetches page 1, then every remaining page concurrently; returns (items, error)."""
+        # Each page goes through send(), so unchanged pages revalidate with a free 304
+        params = {"per_page": 100, **(params or {})}
+        try:
+            first = self.send("GET", path, headers=headers, params={**params, "page": 1})
+        except GitHubRateLimitError as e:
+            return [], str(e)
+        if not first.ok:
+            return [], first.json().get("message", first.text) if first.content else f"HTTP {first.status_code}"
+        last_url = first.links.get("last", {}).get("url")
+        last_page = int(parse_qs(urlparse(last_url).query).get("page", ["1"])[0]) if last_url else 1
+        pages = {1: first.json()}
+
+        def fetch(page):
+            response = self.send("GET", path, headers=headers, params={**params, "page": page})
+            response.raise_for_status()
+            return page, response.json()
+
+        if last_page > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                try:
+                    for page, items in executor.map(fetch, range(2, last_page + 1)):
+                        pages[page] = items
+                except Exception as e:
+                    return [item for page in sorted(pages) for item in pages[page]], f"Partial listing: {e}"
+        return [item for page in sorted(pages) for item in pages[page]], None
+
+@st.cache_resource
+def get_github_client():
+    """Process-wide GitHub client so every session shares one connection pool."""
+    return GitHubClient()
+
+
+# --- Git Batch Commit ---
+# Lands any number of files as a single commit with a fixed number of git
+# processes: every blob, the tree and the commit are streamed through one
+# `git fast-import`, then the work tree is synced and pushed. Spawns stay
+# constant no matter how many files are uploaded.
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+def safe_repo_path(*parts):
+    """Joins path parts into a normalized repo-relative POSIX path, rejecting escapes and .git."""
+    path = PurePosixPath(*[p.replace("\\", "/") for p in parts if p])
+    clean = [part for part in path.parts if part not in ("", ".")]
+    # .git at any depth (any case, for case-insensitive filesystems) would reach into git's own files
+    if not clean or path.is_absolute() or ".." in clean or any(part.lower() == ".git" for part in clean):
+        raise ValueError(f"Refusing unsafe path: {path}")
+    return "/".join(clean)
+
+def _strip_top_level(entries):
+    """Drops a single shared top-level folder, as archives of a project directory usually have."""
+    tops = {name.split("/", 1)[0] for name, _, _ in entries}
+    if len(tops) == 1 and all("/" in name for name, _, _ in entries):
+        return [(name.split("/", 1)[1], data, executable) for name, data, executable in entries]
+    return entries
+
+def read_archive(name, data):
+    """Returns [(path, bytes, executable)] for the regular files in a zip or tar archive."""
+    entries = []
+    if name.lower().endswith(".zip"):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    executable = bool((info.external_attr >> 16) & 0o111)
+                    entries.append((info.filename, archive.read(info), executable))
+    else:
+        with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+            for member in archive.getmembers():
+                if member.isfile():
+                    entries.append((member.name, archive.extractfile(member).read(), bool(member.mode & 0o111)))
+    return _strip_top_level(entries)
+
+def collect_upload_files(uploads, target_dir=""):
+    """Expands uploaded files and archives into {repo path: (bytes, executable)}."""
+    files = {}
+    for upload in uploads:
+        data = upload.getvalue()
+        if upload.name.lower().endswith(ARCHIVE_SUFFIXES):
+            for path, content, executable in read_archive(upload.name, data):
+                files[safe_repo_path(target_dir, path)] = (content, executable)
+        else:
+            files[safe_repo_path(target_dir, upload.name)] = (data, False)
+    return files
+
+def _ident_part(value):
+    """Strips what would break a fast-import `committer Name <email>` line."""
+    return re.sub(r"[<>\r\n]", "", value).strip()
+
+def _git(repo_path, *args, input=None):
+    with timed_call("subprocess", f"git {args[0]}"):
+        return subprocess.run(["git", *args], cwd=repo_path, input=input, capture_output=True)
+
+def fast_import_commit(repo_path, files, message, author_name, author_email):
+    """Commits files onto the checked-out branch with one fast-import; returns (ok, log lines)."""
+    head_ref = _git(repo_path, "symbolic-ref", "-q", "HEAD")
+    if head_ref.returncode != 0:
+        return False, ["HEAD is detached; check out a branch first."]
+    branch_ref = head_ref.stdout.decode().strip()
+    parent = _git(repo_path, "rev-parse", "-q", "--verify", "HEAD^{commit}")
+    parent_sha = parent.stdout.decode().strip() if parent.returncode == 0 else None
+
+    stream = io.BytesIO()
+    message_bytes = message.encode("utf-8")
+    stream.write(f"commit {branch_ref}\n".encode())
+    stream.write(f"committer {_ident_part(author_name)} <{_ident_part(author_email)}> {int(time.time())} +0000\n".encode())
+    stream.write(f"data {len(message_bytes)}\n".encode() + message_bytes + b"\n")
+    if parent_sha:
+        stream.write(f"from {parent_sha}\n".encode())
+    for path, (content, executable) in sorted(files.items()):
+        # fast-import accepts C-style quoted paths, which JSON string syntax satisfies here
+        quoted = json.dumps(path, ensure_ascii=False) if any(c in path for c in '"\\\n') or path.startswith(" ") else path
+        stream.write(f"M {'100755' if executable else '100644'} inline {quoted}\n".encode("utf-8"))
+        stream.write(f"data {len(content)}\n".encode() + content + b"\n")
+    stream.write(b"done\n")
+
+    result = _git(repo_path, "fast-import", "--quiet", "--done", input=stream.getvalue())
+    if result.returncode != 0:
+        return False, [f"fast-import failed: {result.stderr.decode(errors='replace')}"]
+    log = [f"Committed {len(files)} file(s) to {branch_ref} in one fast-import."]
+    # fast-import only moves the branch ref; bring the index and work tree along
+    reset = _git(repo_path, "reset", "--hard", "-q", "HEAD")
+    if reset.returncode != 0:
+        return False, log + [f"Work tree sync failed: {reset.stderr.decode(errors='replace')}"]
+    return True, log
+
+
+# --- Git Mirror Cache ---
+# A process-wide directory of bare mirrors keyed by remote URL. The first
+# clone of a repo builds the mirror; later clones only fetch what changed into
+# it and then `clone --shared` from it, borrowing its objects through
+# alternates, so the working tree appears without re-downloading history.
+# Every clone refreshes the mirror with the requesting user's own credentials,
+# so a user who cannot fetch a repo upstream cannot read it from the cache.
+# Mirrors hold branches and tags only (`--bare`, not `--mirror`), so hosting
+# side refs such as GitHub's refs/pull/* are never downloaded. Shallow and
+# partial clones bypass the mirror and go straight to the remote.
+CLONE_STRATEGIES = {
+    "Mirror cache (shared objects)": None,
+    "Shallow (--depth 1)": ["--depth", "1"],
+    "Partial (--filter=blob:none)": ["--filter=blob:none"],
+}
+
+class GitMirrorCache:
+    """Bare mirrors shared by all sessions, refreshed incrementally with fetch."""
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get("GIT_MIRROR_CACHE")
+                         or Path(tempfile.gettempdir()) / "dev_control_center_git_mirrors")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def normalize_url(url):
+        """Canonical form used as the cache key: no credentials, no trailing .git or slash."""
+        scheme, sep, rest = url.strip().partition("://")
+        rest = rest.rpartition("@")[2] if sep else rest
+        key = f"{scheme.lower()}{sep}{rest}".rstrip("/")
+        return key[:-4] if key.endswith(".git") else key
+
+    def mirror_path(self, url):
+        return self.root / (hashlib.sha256(self.normalize_url(url).encode()).hexdigest()[:24] + ".git")
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(str(path), threading.Lock())
+
+    def refresh(self, clean_url, authed_url, run):
+        """Creates or incrementally fetches the mirror; returns (ok, mirror path)."""
+        mirror = self.mirror_path(clean_url)
+        with self._lock_for(mirror):
+            if not (mirror / "HEAD").exists():
+                record_cache("git_mirror", False)
+                # Never gc/prune: session clones borrow these objects through alternates
+                ok, _ = run(["git", "clone", "--bare", "-c", "gc.auto=0", "-c", "gc.pruneExpire=never",
+                             authed_url, str(mirror)], str(self.root))
+                if not ok:
+                    shutil.rmtree(mirror, ignore_errors=True)
+                    return False, mirror
+                # Keep the token out of the shared mirror's config
+                ok, _ = run(["git", "remote", "set-url", "origin", clean_url], str(mirror))
+                return ok, mirror
+            record_cache("git_mirror", True)
+            ok, _ = run(["git", "fetch", "--prune", "--quiet", authed_url, "+refs/heads/*:refs/heads/*",
+                         "+refs/tags/*:refs/tags/*"], str(mirror))
+            return ok, mirror
+
+    def clone(self, clean_url, authed_url, dest, run, strategy="Mirror cache (shared objects)"):
+        """Produces a working clone at dest using the chosen strategy; returns success."""
+        extra = CLONE_STRATEGIES[strategy]
+        if extra is not None:
+            ok, _ = run(["git", "clone", *extra, authed_url, dest], str(Path(dest).parent))
+            return ok
+        ok, mirror = self.refresh(clean_url, authed_url, run)
+        if not ok:
+            return False
+        ok, _ = run(["git", "clone", "--shared", str(mirror), dest], str(Path(dest).parent))
+        if ok:
+            # Push and pull go to the real remote, not the local mirror
+            ok, _ = run(["git", "remote", "set-url", "origin", authed_url], dest)
+        return ok
+
+@st.cache_resource
+def get_git_mirror_cache():
+    """Process-wide mirror cache shared by every session."""
+    return GitMirrorCache()
+
+
+# --- Background Git Jobs ---
+# Long git operations (clone, push) run on a bounded, process-wide worker pool
+# instead of the script thread. A job keeps its status and a bounded log tail,
+# so any later rerun of the owning session can render progress, and the
+# currently running subprocess can be terminated on cancel. Jobs touching the
+# same working tree wait in a per-key queue and are only handed to the pool
+# when the one ahead finishes, so they never hold a worker while blocked;
+# different repos and users run in parallel.
+class GitJob:
+    """One queued/running/finished git operation with a live log."""
+
+    def __init__(self, title, fn, lock_key=None, secrets=(), log_lines=2000):
+        self.id = hashlib.sha1(f"{title}{time.time()}{random.random()}".encode()).hexdigest()[:10]
+        self.title = title
+        self.fn = fn
+        self.lock_key = lock_key
+        self.secrets = [secret for secret in secrets if secret]
+        self.log = deque(maxlen=log_lines)
+        self.status = "queued"
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._process = None
+
+    def _mask(self, text):
+        for secret in self.secrets:
+            text = text.replace(secret, "***")
+        return text
+
+    def write(self, line):
+        self.log.append(self._mask(line.rstrip("\n")))
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+    def run_command(self, command, cwd):
+        """Runs a command, streaming its combined output into the log; returns (ok, output)."""
+        if self.cancelled:
+            return False, "cancelled"
+        self.write(f"▶️ {' '.join(command)}")
+        lines = []
+        started = time.perf_counter()
+        try:
+            self._process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                             text=True, encoding="utf-8", errors="replace")
+            for line in self._process.stdout:
+                lines.append(line)
+                self.write(line)
+            code = self._process.wait()
+        except OSError as e:
+            self.write(f"❌ {e}")
+            return False, str(e)
+        finally:
+            self._process = None
+            # Arguments can carry tokens, so only the program and subcommand are recorded
+            record_call("subprocess", " ".join(command[:2]), time.perf_counter() - started)
+        if self.cancelled:
+            self.write("⏹️ Cancelled")
+            return False, "cancelled"
+        if code != 0:
+            self.write(f"❌ Command failed with exit code {code}")
+        return code == 0, "".join(lines)
+
+class GitJobRunner:
+    """Bounded worker pool for GitJobs, shared by all sessions."""
+
+    MAX_WORKERS = 4
+    MAX_FINISHED = 200  # finished jobs kept for display before the oldest are dropped
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._waiting = {}  # lock_key with a job in the pool: jobs queued behind it
+
+    def _dispatch_next(self, key):
+        with self._lock:
+            queue = self._waiting[key]
+            if not queue:
+                del self._waiting[key]
+                return
+            job = queue.popleft()
+        self._executor.submit(self._run, job)
+
+    def _run(self, job):
+        try:
+            if job.cancelled:
+                job.status = "cancelled"
+                return
+            job.status, job.started = "running", time.time()
+            job.result = job.fn(job)
+            job.status = "cancelled" if job.cancelled else ("succeeded" if job.result else "failed")
+        except Exception as e:
+            job.write(f"❌ {e}")
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            if job.lock_key:
+                self._dispatch_next(job.lock_key)
+
+    def submit(self, title, fn, lock_key=None, secrets=()):
+        """Queues fn(job) -> truthy result on success; returns the GitJob."""
+        job = GitJob(title, fn, lock_key, secrets)
+        with self._lock:
+            self._jobs[job.id] = job
+            finished = [j.id for j in self._jobs.values() if j.done]
+            for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED)]:
+                del self._jobs[job_id]
+            if job.lock_key:
+                if job.lock_key in self._waiting:
+                    self._waiting[job.lock_key].append(job)
+                    return job
+                self._waiting[job.lock_key] = deque()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+@st.cache_resource
+def get_git_job_runner():
+    """Process-wide git job runner."""
+    return GitJobRunner()
+
+
+
+# --- Multi-Host Fan-Out ---
+# Runs one Docker action against many hosts at once through a bounded thread
+# pool. Each worker borrows its host's pooled connection, so a second fan-out
+# to the same hosts skips the SSH handshake entirely.
+FANOUT_MAX_WORKERS = 8
+
+FANOUT_ACTIONS = {
+    "List Containers": "docker ps -a --format '{{.Names}}\\t{{.Image}}\\t{{.Status}}'",
+    "🖼️ List Images": "docker images --format '{{.Repository}}:{{.Tag}}\\t{{.ID}}\\t{{.Size}}'",
+    "📥 Pull Image": "docker pull",
+    "🧹 System Cleanup": "docker system prune -af",
+}
+
+def parse_host_targets(text, default_user):
+    """Parses one host per line, optionally as user@host; blank lines and # comments are skipped."""
+    targets = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        user, _, host = line.rpartition("@")
+        targets.append((host, user or default_user))
+    return list(dict.fromkeys(targets))
+
+def fan_out_command(pool, targets, password, cmd, max_workers=FANOUT_MAX_WORKERS):
+    """Runs cmd on every (host, user) target concurrently; yields one result dict per host as it finishes."""
+    def run_one(host, user):
+        start = time.perf_counter()
+        try:
+            client = pool.get(host, user, password)
+            out, err, code = run_remote_command(client, cmd)
+        except Exception as e:
+            out, err, code = None, f"Connection Failed: {e}", -1
+        return {"Host": host, "User": user, "Exit Code": code,
+                "Latency (ms)": round((time.perf_counter() - start) * 1000, 1),
+                "Output": out or "", "Error": err or ""}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets)))) as executor:
+        futures = [executor.submit(run_one, host, user) for host, user in targets]
+        for future in as_completed(futures):
+            yield future.result()
+
+def run_fan_out_actions(pool, targets, password):
+    """UI for running one Docker action across several hosts."""
+    st.subheader(f"🌐 Multi-Host Actions ({len(targets)} hosts)")
+    if not targets:
+        st.info("ℹ️ Add one host per line in the sidebar to fan out an action.")
+        return
+
+    action = st.selectbox("Action to run on every host:", list(FANOUT_ACTIONS))
+    image = ""
+    if action == "📥 Pull Image":
+        image = st.text_input("Image Name & Tag", placeholder="e.g., ubuntu:22.04")
+    if action == "🧹 System Cleanup":
+        st.warning("⚠️ This prunes stopped containers, unused networks, dangling images and build cache on EVERY listed host.")
+    max_workers = st.slider("Max concurrent hosts", 1, 32, FANOUT_MAX_WORKERS)
+
+    if st.button(f"Run on {len(targets)} hosts", type="primary", disabled=action == "📥 Pull Image" and not image):
+        cmd = FANOUT_ACTIONS[action]
+        if image:
+            cmd += f" {shlex.quote(image)}"
+        progress = st.progress(0.0, text="Starting...")
+        results = []
+        with st.spinner(f"Running on {len(targets)} hosts..."):
+            for result in fan_out_command(pool, targets, password, cmd, max_workers):
+                results.append(result)
+                progress.progress(len(results) / len(targets), text=f"{len(results)}/{len(targets)} hosts done")
+
+        results.sort(key=lambda r: r["Host"])
+        failed = [r for r in results if r["Exit Code"] != 0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Succeeded", len(results) - len(failed))
+        col2.metric("Failed", len(failed))
+        col3.metric("Slowest", f"{max(r['Latency (ms)'] for r in results):.0f} ms")
+        st.dataframe(
+            [{k: v for k, v in r.items() if k != "Output"} for r in results],
+            use_container_width=True
+        )
+
+        if action in ("List Containers", "🖼️ List Images"):
+            columns = ["Name", "Image", "Status"] if action == "List Containers" else ["Image", "ID", "Size"]
+            rows = [
+                {"Host": r["Host"], **dict(zip(columns, line.split("\t")))}
+                for r in results if r["Exit Code"] == 0 for line in r["Output"].splitlines()
+            ]
+            st.dataframe(rows, use_container_width=True)
+        else:
+            for r in results:
+                with st.expander(f"{'✅' if r['Exit Code'] == 0 else '❌'} {r['Host']}"):
+                    st.code(r["Output"] or r["Error"])
+
+
+# --- Bulk Mail Merge ---
+# Sends one templated message per CSV row over a small pool of authenticated
+# SMTP connections that are reused across messages, so the handshake,
+# STARTTLS and login happen once per connection instead of once per email.
+# A shared rate limiter throttles the whole campaign, 4xx replies and dropped
+# connections are retried with backoff, and every outcome is appended to a
+# JSONL log on disk: restarting a campaign with the same CSV, templates and
+# sender skips the rows already sent.
+MAIL_TEMPLATE_FIELD = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+EMAIL_ADDRESS = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def render_mail_template(template, row):
+    """Fills {{column}} placeholders from row; raises KeyError naming a missing column."""
+    def field(match):
+        value = row.get(match.group(1))
+        if value is None:
+            raise KeyError(match.group(1))
+        return str(value)
+    return MAIL_TEMPLATE_FIELD.sub(field, template)
+
+def is_transient_smtp_error(error):
+    """True for failures worth retrying: 4xx replies, dropped connections and network errors."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # Other SMTPExceptions are protocol/usage errors; plain OSErrors are network trouble
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class SMTPPool:
+    """Up to `size` authenticated SMTP connections, reused across messages and threads."""
+
+    IDLE_CHECK_AFTER = 30  # seconds idle before a NOOP confirms the server still has us
+
+    def __init__(self, host, port, username="", password="", security="starttls", size=3, timeout=30, max_messages=100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.security = security
+        self.size = size
+        self.timeout = timeout
+        self.max_messages = max_messages  # recycle connections before providers start refusing
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _connect(self):
+        smtp_cls = smtplib.SMTP_SSL if self.security == "ssl" else smtplib.SMTP
+        smtp = smtp_cls(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.security == "starttls":
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return {"smtp": smtp, "sent": 0, "last_used": time.monotonic()}
+
+    @staticmethod
+    def _close(entry):
+        try:
+            entry["smtp"].quit()
+        except Exception:
+            entry["smtp"].close()
+
+    def _checkout(self):
+        with self._lock:
+            entry = self._idle.pop() if self._idle else None
+        if entry is not None and time.monotonic() - entry["last_used"] > self.IDLE_CHECK_AFTER:
+            try:
+                if entry["smtp"].noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP refused")
+            except (smtplib.SMTPException, OSError):
+                entry["smtp"].close()
+                entry = None
+        return entry or self._connect()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection; it is returned on success and dropped if its state is unknown."""
+        with self._slots:
+            entry = self._checkout()
+            try:
+                yield entry["smtp"]
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                # smtplib has already sent RSET, so the session is reusable, unless the
+                # server said 421 (closing) and smtplib dropped the socket
+                if getattr(e, "smtp_code", None) == 421 or entry["smtp"].sock is None:
+                    entry["smtp"].close()
+                else:
+                    self._release(entry)
+                raise
+            except BaseException:
+                entry["smtp"].close()
+                raise
+            entry["sent"] += 1
+            self._release(entry)
+
+    def _release(self, entry):
+        entry["last_used"] = time.monotonic()
+        if entry["sent"] >= self.max_messages:
+            self._close(entry)
+            return
+        with self._lock:
+            self._idle.append(entry)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._close(entry)
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads (rate <= 0 disables it)."""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, cancel_event):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            cancel_event.wait(slot - now)
+
+def get_mail_merge_dir():
+    path = Path(os.environ.get("MAIL_MERGE_DIR") or Path(tempfile.gettempdir()) / "dev_control_center_mail_merge")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+class MailMergeCampaign:
+    """A resumable bulk send with a per-recipient result log."""
+
+    RETRY_BASE_DELAY = 2.0
+    MAX_RETRY_DELAY = 60.0
+
+    def __init__(self, campaign_id, rows, email_column, sender, subject_template, body_template, html=False):
+        self.id = campaign_id
+        self.rows = rows
+        self.email_column = email_column
+        self.sender = sender
+        self.subject_template = subject_template
+        self.body_template = body_template
+        self.html = html
+        self.log_path = get_mail_merge_dir() / f"{campaign_id}.jsonl"
+        self.results = {}
+        self.status = "ready"
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._load_log()
+
+    @staticmethod
+    def make_id(csv_bytes, email_column, sender, subject_template, body_template, html):
+        digest = hashlib.sha256(csv_bytes)
+        for part in (email_column, sender, subject_template, body_template, str(html)):
+            digest.update(b"\0" + part.encode())
+        return digest.hexdigest()[:16]
+
+    def _load_log(self):
+        if not self.log_path.exists():
+            return
+        line = ""
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                self.results[result["Row"]] = result
+        if line and not line.endswith("\n"):
+            # End the torn line so the next appended result is not glued onto it and lost
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    def counts(self):
+        with self._lock:
+            statuses = [r["Status"] for r in self.results.values()]
+        sent, failed = statuses.count("sent"), statuses.count("failed")
+        return {"sent": sent, "failed": failed, "pending": len(self.rows) - sent - failed}
+
+    def result_log(self):
+        with self._lock:
+            return sorted(self.results.values(), key=lambda r: r["Row"])
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def build_message(self, row):
+        """Renders one row into a MIME message; raises KeyError/ValueError for bad rows."""
+        recipient = (row.get(self.email_column) or "").strip()
+        if not EMAIL_ADDRESS.match(recipient):
+            raise ValueError(f"invalid address {recipient!r}")
+        msg = MIMEMultipart()
+        msg["From"] = self.sender
+        msg["To"] = recipient
+        msg["Subject"] = render_mail_template(self.subject_template, row)
+        msg.attach(MIMEText(render_mail_template(self.body_template, row), "html" if self.html else "plain"))
+        return msg
+
+    def start(self, pool, rate_per_second=1.0, max_retries=3, retry_failed=True):
+        """Sends every row not yet sent (and, with retry_failed, not yet failed) on a background thread."""
+        if self.running:
+            return
+        skip = {"sent", "failed"} if not retry_failed else {"sent"}
+        with self._lock:
+            pending = [i for i in range(len(self.rows)) if self.results.get(i, {}).get("Status") not in skip]
+        self._cancel.clear()
+        self.status, self.error, self.started, self.finished = "running", None, time.time(), None
+        self._thread = threading.Thread(target=self._run, args=(pool, RateLimiter(rate_per_second), max_retries, pending),
+                                        name=f"mail-merge-{self.id}", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _record(self, log, index, recipient, status, attempts, detail=""):
+        result = {"Row": index, "Email": recipient, "Status": status, "Attempts": attempts, "Detail": detail,
+                  "Time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        with self._lock:
+            self.results[index] = result
+            log.write(json.dumps(result) + "\n")
+            log.flush()
+
+    def _send(self, pool, limiter, max_retries, log, index):
+        row = self.rows[index]
+        recipient = (row.get(self.email_column) or "").strip()
+        try:
+            msg = self.build_message(row)
+        except KeyError as e:
+            self._record(log, index, recipient, "failed", 0, f"missing column {e}")
+            return
+        except ValueError as e:
+            self._record(log, index, recipient, "failed", 0, str(e))
+            return
+        for attempt in range(1, max_retries + 2):
+            limiter.wait(self._cancel)
+            if self._cancel.is_set():
+                return  # not logged, so a resume sends it
+            try:
+                with pool.connection() as smtp:
+                    smtp.send_message(msg)
+                self._record(log, index, recipient, "sent", attempt)
+                return
+            except smtplib.SMTPAuthenticationError as e:
+                # Every later message would fail the same way
+                self.error = f"Authentication failed: {e.smtp_code} {e.smtp_error.decode(errors='replace')}"
+                self._cancel.set()
+                return
+            except Exception as e:
+                if not is_transient_smtp_error(e) or attempt > max_retries:
+                    self._record(log, index, recipient, "failed", attempt, f"{type(e).__name__}: {e}")
+                    return
+                delay = min(self.MAX_RETRY_DELAY, self.RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                self._cancel.wait(delay * random.uniform(0.8, 1.2))
+
+    def _run(self, pool, limiter, max_retries, pending):
+        work = iter(pending)
+        work_lock = threading.Lock()
+
+        def worker():
+            while not self._cancel.is_set():
+                with work_lock:
+                    index = next(work, None)
+                if index is None:
+                    return
+                self._send(pool, limiter, max_retries, log, index)
+
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                # One worker per pooled connection keeps every connection busy
+                workers = [threading.Thread(target=worker, daemon=True) for _ in range(pool.size)]
+                for thread in workers:
+                    thread.start()
+                for thread in workers:
+                    thread.join()
+            self.status = "failed" if self.error else ("cancelled" if self._cancel.is_set() else "finished")
+        except Exception as e:
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            pool.close()
+            self.finished = time.time()
+
+@st.cache_resource
+def get_mail_merge_campaigns():
+    """Process-wide campaign registry, so a reconnecting session re-attaches to a running send."""
+    return {"lock": threading.Lock(), "campaigns": {}}
+
+def get_mail_merge_campaign(csv_bytes, rows, email_column, sender, subject_template, body_template, html=False):
+    campaign_id = MailMergeCampaign.make_id(csv_bytes, email_column, sender, subject_template, body_template, html)
+    registry = get_mail_merge_campaigns()
+    with registry["lock"]:
+        campaign = registry["campaigns"].get(campaign_id)
+        if campaign is None:
+            campaign = registry["campaigns"][campaign_id] = MailMergeCampaign(
+                campaign_id, rows, email_column, sender, subject_template, body_template, html)
+        return campaign
+
+
+# --- Simulator Virtual Filesystem ---
+# In-memory tree of inode-style nodes for the Linux Terminal Simulator.
+# Directories hold a dict of children for O(1) lookup, files hold their bytes,
+# and __slots__ keeps per-node overhead small enough for trees of 100k+
+# entries. Walks are iterative so deep trees cannot hit the recursion limit.
+class VFSError(Exception):
+    """A filesystem error whose message reads like the matching shell error."""
+
+class VNode:
+    __slots__ = ("name", "parent", "mtime")
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.mtime = time.time()
+
+    is_dir = False
+
+    @property
+    def path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return "/" + "/".join(reversed(parts))
+
+class VFile(VNode):
+    __slots__ = ("data",)
+
+    def __init__(self, name, parent=None, data=b""):
+        super().__init__(name, parent)
+        self.data = data
+
+    @property
+    def size(self):
+        return len(self.data)
+
+class VDir(VNode):
+    __slots__ = ("children",)
+    is_dir = True
+
+    def __init__(self, name, parent=None):
+        super().__init__(name, parent)
+        self.children = {}
+
+    size = 4096
+
+    def attach(self, node):
+        node.parent = self
+        self.children[node.name] = node
+        self.mtime = time.time()
+        return node
+
+    def detach(self, name):
+        node = self.children.pop(name)
+        node.parent = None
+        self.mtime = time.time()
+        return node
+
+class VirtualFS:
+    """Path resolution and file operations over a VDir tree."""
+
+    def __init__(self, home="/home/user"):
+        self.root = VDir("")
+        self.home = home
+
+    def normalize(self, path, cwd="/"):
+        """Absolute, normalized path for path relative to cwd (handles ~, . and ..)."""
+        if path == "~" or path.startswith("~/"):
+            path = self.home + path[1:]
+        parts = [] if path.startswith("/") else [p for p in cwd.split("/") if p]
+        for part in path.split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if parts:
+                    parts.pop()
+            else:
+                parts.append(part)
+        return "/" + "/".join(parts)
+
+    def resolve(self, path, cwd="/"):
+        """The node at path; raises VFSError when any component is missing."""
+        node = self.root
+        for part in self.normalize(path, cwd).split("/"):
+            if not part:
+                continue
+            if not node.is_dir:
+                raise VFSError(f"{path}: Not a directory")
+            node = node.children.get(part)
+            if node is None:
+                raise VFSError(f"{path}: No such file or directory")
+        return node
+
+    def exists(self, path, cwd="/"):
+        try:
+            self.resolve(path, cwd)
+            return True
+        except VFSError:
+            return False
+
+    def _parent_and_name(self, path, cwd):
+        full = self.normalize(path, cwd)
+        if full == "/":
+            raise VFSError(f"{path}: Is the root directory")
+        parent_path, _, name = full.rpartition("/")
+        parent = self.resolve(parent_path or "/")
+        if not parent.is_dir:
+            raise VFSError(f"{path}: Not a directory")
+        return parent, name
+
+    def mkdir(self, path, cwd="/", parents=False):
+        if parents:
+            node = self.root
+            for part in self.normalize(path, cwd).split("/"):
+                if not part:
+                    continue
+                child = node.children.get(part)
+                if child is None:
+                    child = node.attach(VDir(part))
+                elif not child.is_dir:
+                    raise VFSError(f"cannot create directory '{path}': Not a directory")
+                node = child
+            return node
+        parent, name = self._parent_and_name(path, cwd)
+        if name in parent.children:
+            raise VFSError(f"cannot create directory '{path}': File exists")
+        return parent.attach(VDir(name))
+
+    def touch(self, path, cwd="/"):
+        parent, name = self._parent_and_name(path, cwd)
+        node = parent.children.get(name)
+        if node is None:
+            return parent.attach(VFile(name))
+        node.mtime = time.time()
+        return node
 
-# --- Page Configuration ---
-st.set_page_config(page_title="Dev Control Center", page_icon="⚙️", layout="wide")
+    def write(self, path, data, cwd="/", append=False):
+        parent, name = self._parent_and_name(path, cwd)
+        node = parent.children.get(name)
+        if node is None:
+            node = parent.attach(VFile(name))
+        elif node.is_dir:
+            raise VFSError(f"{path}: Is a directory")
+        node.data = node.data + data if append else data
+        node.mtime = time.time()
+        return node
+
+    def read(self, path, cwd="/"):
+        node = self.resolve(path, cwd)
+        if node.is_dir:
+            raise VFSError(f"{path}: Is a directory")
+        return node.data
+
+    def remove(self, path, cwd="/", recursive=False):
+        node = self.resolve(path, cwd)
+        if node is self.root:
+            raise VFSError(f"cannot remove '{path}': Permission denied")
+        if node.is_dir and not recursive:
+            raise VFSError(f"cannot remove '{path}': Is a directory")
+        # Detaching is O(1); the subtree is freed with its last reference
+        node.parent.detach(node.name)
+
+    def move(self, src, dst, cwd="/"):
+        node = self.resolve(src, cwd)
+        if node is self.root:
+            raise VFSError(f"cannot move '{src}': Device or resource busy")
+        try:
+            target = self.resolve(dst, cwd)
+        except VFSError:
+            target = None
+        if target is not None and target.is_dir:
+            parent, name = target, node.name
+        else:
+            parent, name = self._parent_and_name(dst, cwd)
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is node:
+                raise VFSError(f"cannot move '{src}' to a subdirectory of itself, '{dst}'")
+            ancestor = ancestor.parent
+        existing = parent.children.get(name)
+        if existing is node:
+            return node
+        if existing is not None and existing.is_dir:
+            raise VFSError(f"cannot overwrite directory '{dst}'")
+        node.parent.detach(node.name)
+        node.name = name
+        return parent.attach(node)
+
+    @staticmethod
+    def walk(node, path):
+        """Yields (path, node) for node and everything below it, depth-first, parents first."""
+        stack = [(path, node)]
+        while stack:
+            path, node = stack.pop()
+            yield path, node
+            if node.is_dir:
+                base = path.rstrip("/")
+                stack.extend((f"{base}/{name}", child) for name, child in
+                             sorted(node.children.items(), reverse=True))
+
+    @staticmethod
+    def disk_usage(node, path):
+        """Returns [(path, bytes)] for node and every directory below it, children before parents."""
+        if not node.is_dir:
+            return [(path, node.size)]
+        totals = []
+        stack = [(path, node, False)]
+        sizes = {}
+        while stack:
+            path, current, expanded = stack.pop()
+            if not expanded:
+                stack.append((path, current, True))
+                base = path.rstrip("/")
+                for name, child in current.children.items():
+                    if child.is_dir:
+                        stack.append((f"{base}/{name}", child, False))
+                continue
+            size = sum(c.size for c in current.children.values() if not c.is_dir)
+            size += sum(sizes.pop(id(c)) for c in current.children.values() if c.is_dir)
+            sizes[id(current)] = size
+            totals.append((path, size))
+        return totals
+
+    @classmethod
+    def from_structure(cls, structure, home="/home/user"):
+        """Builds a filesystem from a {dir path: [names]} map; names with a '.' become files."""
+        fs = cls(home)
+        for directory in sorted(structure, key=len):
+            parent = fs.mkdir(directory, parents=True)
+            for name in structure[directory]:
+                if name in parent.children:
+                    continue
+                if "." in name:
+                    parent.attach(VFile(name, data=f"Simulated content of {name}.\nThis is a text file.\nHave a nice day.\n".encode()))
+                else:
+                    parent.attach(VDir(name))
+        fs.mkdir(home, parents=True)
+        return fs
+
+SIMULATOR_SEED_TREE = {
+    '/home/user': ['Documents', 'Downloads', 'Pictures', 'Desktop', 'README.txt'],
+    '/home/user/Documents': ['report.docx', 'notes.txt', 'projects'],
+    '/home/user/Documents/projects': ['alpha', 'beta'],
+    '/home/user/Downloads': ['installer.dmg', 'archive.zip'],
+    '/home/user/Pictures': ['photo.jpg'],
+    '/': ['home', 'var', 'etc', 'bin'],
+}
+
+# Terminal history is a ring buffer of entries whose output is truncated on the
+# way in, and only one page of it is rendered per rerun, so rerun cost stays
+# flat no matter how many commands a session has run.
+TERMINAL_HISTORY_LIMIT = 500
+TERMINAL_OUTPUT_MAX_LINES = 200
+TERMINAL_OUTPUT_MAX_CHARS = 20_000
+TERMINAL_PAGE_SIZE = 50
+
+def truncate_output(text, max_lines=TERMINAL_OUTPUT_MAX_LINES, max_chars=TERMINAL_OUTPUT_MAX_CHARS):
+    """Caps text at max_lines/max_chars, noting how much was cut."""
+    if len(text) <= max_chars and text.count("\n") < max_lines:
+        return text
+    lines = text[:max_chars].split("\n")[:max_lines]
+    kept = "\n".join(lines)
+    dropped = text.count("\n") + 1 - len(lines)
+    note = f"{dropped} more lines" if dropped > 0 else f"{len(text) - len(kept)} more characters"
+    return f"{kept}\n... [output truncated: {note}]"
+
+def render_terminal_history(history, page=1, page_size=TERMINAL_PAGE_SIZE):
+    """Renders one page of history (page 1 = newest) as a single transcript block."""
+    stop = len(history) - (page - 1) * page_size
+    start = max(0, stop - page_size)
+    lines = []
+    for entry in itertools.islice(history, start, stop):
+        lines.append(entry['cmd'])
+        if entry['out']:
+            lines.append(entry['out'])
+    return "\n".join(lines)
+
+
+# --- Simulator Filesystem Snapshots ---
+# Compact binary snapshots of a VirtualFS. Layout: header, a fixed-size node
+# table in breadth-first order (so each directory's children are one
+# contiguous run of records), a names blob and a data blob. A snapshot is
+# memory-mapped once per process and shared read-only by every session; each
+# session materializes only the directories it touches and reads file bytes
+# from the mapping until it writes them, which gives copy-on-write per session.
+SNAPSHOT_MAGIC = b"VFSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sIQQ")     # magic, node count, names offset, data offset
+SNAPSHOT_NODE = struct.Struct("<B3xIIdQQ")    # kind, name offset, name length, mtime, a, b
+SNAPSHOT_DIR, SNAPSHOT_FILE = 1, 0            # dir: a=first child, b=child count; file: a=data offset, b=length
+
+def save_snapshot(root, out):
+    """Writes the tree under root to the binary file object out."""
+    records, names, blobs = [], bytearray(), []
+    data_size = 0
+    queue = deque([root])
+    next_index = 1
+    while queue:
+        node = queue.popleft()
+        name = node.name.encode()
+        if node.is_dir:
+            children = sorted(node.children.items())
+            records.append((SNAPSHOT_DIR, len(names), len(name), node.mtime, next_index, len(children)))
+            queue.extend(child for _, child in children)
+            next_index += len(children)
+        else:
+            data = node.data
+            records.append((SNAPSHOT_FILE, len(names), len(name), node.mtime, data_size, len(data)))
+            blobs.append(data)
+            data_size += len(data)
+        names += name
+    names_offset = SNAPSHOT_HEADER.size + SNAPSHOT_NODE.size * len(records)
+    out.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(records), names_offset, names_offset + len(names)))
+    for record in records:
+        out.write(SNAPSHOT_NODE.pack(*record))
+    out.write(names)
+    for data in blobs:
+        out.write(data)
+
+class VFSSnapshot:
+    """Read-only view of a snapshot held in a buffer (usually an mmap)."""
+
+    def __init__(self, buffer):
+        if len(buffer) < SNAPSHOT_HEADER.size + SNAPSHOT_NODE.size or buffer[:8] != SNAPSHOT_MAGIC:
+            raise ValueError("Not a simulator filesystem snapshot")
+        self.buffer = buffer
+        _, self.node_count, self.names_offset, self.data_offset = SNAPSHOT_HEADER.unpack_from(buffer)
+        self._validate()
+
+    def _validate(self):
+        """Checks the whole node table once, so a corrupt or hostile file fails here with ValueError."""
+        # Snapshots can be uploaded: a child range pointing backwards would make
+        # the tree cyclic and hang any walk, and bad offsets would surface later
+        # as struct/decode errors in the middle of a shell command.
+        if (self.node_count < 1 or self.names_offset != SNAPSHOT_HEADER.size + SNAPSHOT_NODE.size * self.node_count
+                or not self.names_offset <= self.data_offset <= len(self.buffer)):
+            raise ValueError("Snapshot header does not match its size")
+        names_size = self.data_offset - self.names_offset
+        data_size = len(self.buffer) - self.data_offset
+        next_child = 1  # children of each directory follow on from the previous one, as save_snapshot writes them
+        records = SNAPSHOT_NODE.iter_unpack(self.buffer[SNAPSHOT_HEADER.size:self.names_offset])
+        for index, (kind, name_offset, name_length, _, a, b) in enumerate(records):
+            if name_offset + name_length > names_size:
+                raise ValueError(f"Snapshot node {index} has its name outside the names table")
+            start = self.names_offset + name_offset
+            name = bytes(self.buffer[start:start + name_length]).decode()
+            if index and (not name or "/" in name or name in (".", "..")):
+                raise ValueError(f"Snapshot node {index} has an invalid name {name!r}")
+            if kind == SNAPSHOT_DIR:
+                if b and (a != next_child or a <= index):
+                    raise ValueError(f"Snapshot directory {name!r} has an out-of-order child range")
+                next_child += b
+                if next_child > self.node_count:
+                    raise ValueError(f"Snapshot directory {name!r} has children past the end of the node table")
+            elif kind != SNAPSHOT_FILE:
+                raise ValueError(f"Snapshot node {index} has an invalid kind")
+            elif not index:
+                raise ValueError("Snapshot root is not a directory")
+            elif a + b > data_size:
+                raise ValueError(f"Snapshot file {name!r} has data outside the data blob")
+        if next_child != self.node_count:
+            raise ValueError("Snapshot has nodes that belong to no directory")
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def read(self, offset, length):
+        start = self.data_offset + offset
+        return bytes(self.buffer[start:start + length])
+
+    def _node(self, record, parent=None):
+        kind, name_offset, name_length, mtime, a, b = record
+        start = self.names_offset + name_offset
+        name = bytes(self.buffer[start:start + name_length]).decode()
+        node = SnapshotDir(name, self, a, b) if kind == SNAPSHOT_DIR else SnapshotFile(name, self, a, b)
+        node.parent = parent
+        node.mtime = mtime
+        return node
+
+    def root(self):
+        return self._node(SNAPSHOT_NODE.unpack_from(self.buffer, SNAPSHOT_HEADER.size))
+
+    def load_children(self, directory):
+        start = SNAPSHOT_HEADER.size + SNAPSHOT_NODE.size * directory.first_child
+        end = start + SNAPSHOT_NODE.size * directory.child_count
+        records = SNAPSHOT_NODE.iter_unpack(self.buffer[start:end])
+        return {node.name: node for node in (self._node(record, directory) for record in records)}
+
+class SnapshotDir(VDir):
+    """A directory whose children are read from a snapshot on first access."""
+    __slots__ = ("snapshot", "first_child", "child_count")
+    _children = VDir.children
+
+    def __init__(self, name, snapshot, first_child, child_count):
+        VNode.__init__(self, name)
+        self.snapshot = snapshot
+        self.first_child = first_child
+        self.child_count = child_count
+
+    @property
+    def children(self):
+        try:
+            return self._children
+        except AttributeError:
+            self._children = self.snapshot.load_children(self)
+            return self._children
+
+class SnapshotFile(VFile):
+    """A file whose bytes stay in the shared snapshot until this session writes it."""
+    __slots__ = ("snapshot", "offset", "length")
+    _data = VFile.data
+
+    def __init__(self, name, snapshot, offset, length):
+        VNode.__init__(self, name)
+        self.snapshot = snapshot
+        self.offset = offset
+        self.length = length
+
+    @property
+    def data(self):
+        try:
+            return self._data
+        except AttributeError:
+            return self.snapshot.read(self.offset, self.length)
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def size(self):
+        try:
+            return len(self._data)
+        except AttributeError:
+            return self.length
+
+def tarball_to_vfs(fileobj, home="/home/user"):
+    """Builds a VirtualFS from a (possibly compressed) tar archive's directories and regular files."""
+    fs = VirtualFS(home)
+    with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+        for member in archive:
+            path = fs.normalize(member.name)
+            if path == "/":
+                continue
+            if member.isdir():
+                node = fs.mkdir(path, parents=True)
+            elif member.isfile():
+                fs.mkdir(str(PurePosixPath(path).parent), parents=True)
+                node = fs.write(path, archive.extractfile(member).read())
+            else:
+                continue
+            node.mtime = member.mtime
+    fs.mkdir(home, parents=True)
+    return fs
+
+def get_snapshot_dir():
+    path = Path(os.environ.get("SIMULATOR_SNAPSHOT_DIR")
+                or Path(tempfile.gettempdir()) / "dev_control_center_vfs_snapshots")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def list_snapshots():
+    return sorted(p.stem for p in get_snapshot_dir().glob("*.vfs"))
+
+def store_snapshot(name, root):
+    """Saves root as a shared snapshot, replacing any snapshot of that name atomically."""
+    name = re.sub(r"[^\w.-]+", "_", name).strip("._") or "snapshot"
+    target = get_snapshot_dir() / f"{name}.vfs"
+    fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        save_snapshot(root, f)
+    os.replace(tmp, target)
+    return name
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _open_snapshot(path, mtime_ns):
+    return VFSSnapshot.open(path)
+
+def get_snapshot(name):
+    """The process-wide mapping of a stored snapshot; a re-saved file gets a fresh mapping."""
+    path = get_snapshot_dir() / f"{name}.vfs"
+    return _open_snapshot(str(path), path.stat().st_mtime_ns)
+
+@st.cache_resource(show_spinner=False)
+def get_seed_snapshot():
+    """The built-in practice tree, serialized once per process."""
+    buffer = io.BytesIO()
+    save_snapshot(VirtualFS.from_structure(SIMULATOR_SEED_TREE).root, buffer)
+    return VFSSnapshot(buffer.getvalue())
+
+def vfs_from_snapshot(snapshot, home="/home/user"):
+    """A session's copy-on-write filesystem over a shared snapshot."""
+    fs = VirtualFS(home)
+    fs.root = snapshot.root()
+    fs.mkdir(home, parents=True)
+    return fs
+
+
+# --- Simulator Shell ---
+# A small shell over VirtualFS with pipes, &&/||/; chaining and </>/>>
+# redirection. Each command is a generator of output lines that pulls from
+# the previous stage lazily, so `find / | grep x | head` stops walking the
+# tree once head has its lines. stderr bypasses pipes, as in a real shell.
+class ShellSyntaxError(Exception):
+    """A command line the simulator shell cannot parse."""
+
+SHELL_CONNECTORS = ("|", "&&", "||", ";")
+SHELL_REDIRECTS = ("<", ">", ">>")
+SHELL_UNSUPPORTED_REDIRECTS = ("2>", "2>>")  # stderr goes straight to the terminal; no fd juggling
+SHELL_TOKEN = re.compile(r"""\s*(?:(2>>|2>|&&|\|\||>>|[|;<>&])|((?:[^\s'"|;&<>\\]|\\.|'[^']*'|"(?:[^"\\]|\\.)*")+))""")
+
+def tokenize_command_line(line):
+    """Yields (is_operator, text) tokens; quoted operators such as '|' stay plain words."""
+    line = line.rstrip()
+    pos = 0
+    while pos < len(line):
+        match = SHELL_TOKEN.match(line, pos)
+        if match is None:
+            raise ShellSyntaxError("unexpected EOF while looking for matching quote")
+        operator, word = match.groups()
+        yield (True, operator) if operator else (False, shlex.split(word)[0])
+        pos = match.end()
+
+def parse_command_line(line):
+    """Parses a command line into [(connector, [stage, ...])] where each stage is
+    {'argv': [...], 'stdin': path or None, 'stdout': (path, append) or None}."""
+    tokens = tokenize_command_line(line)
+    sequence, pipeline, connector = [], [], ";"
+    stage = {'argv': [], 'stdin': None, 'stdout': None}
+    for is_operator, token in tokens:
+        if not is_operator:
+            stage['argv'].append(token)
+        elif token in SHELL_UNSUPPORTED_REDIRECTS:
+            raise ShellSyntaxError(f"unsupported redirect `{token}': the simulator cannot redirect stderr")
+        elif token in SHELL_REDIRECTS:
+            target_is_operator, target = next(tokens, (True, 'newline'))
+            if target_is_operator:
+                raise ShellSyntaxError(f"syntax error near unexpected token `{target}'")
+            if token == "<":
+                stage['stdin'] = target
+            else:
+                stage['stdout'] = (target, token == ">>")
+        elif token in SHELL_CONNECTORS:
+            if not stage['argv']:
+                raise ShellSyntaxError(f"syntax error near unexpected token `{token}'")
+            pipeline.append(stage)
+            stage = {'argv': [], 'stdin': None, 'stdout': None}
+            if token != "|":
+                sequence.append((connector, pipeline))
+                pipeline, connector = [], token
+        else:
+            raise ShellSyntaxError(f"syntax error near unexpected token `{token}'")
+    if stage['argv']:
+        pipeline.append(stage)
+    elif pipeline or stage['stdin'] or stage['stdout'] or connector in ("&&", "||"):
+        raise ShellSyntaxError("syntax error: unexpected end of file")
+    if pipeline:
+        sequence.append((connector, pipeline))
+    return sequence
+
+def split_flags(args):
+    """Splits args into (set of single-letter flags, operands)."""
+    flags = {c for arg in args if arg.startswith('-') and len(arg) > 1 for c in arg[1:]}
+    return flags, [arg for arg in args if not (arg.startswith('-') and len(arg) > 1)]
+
+def format_du_size(size, human):
+    if not human:
+        return str(-(-size // 1024))  # 1K blocks, rounded up like du
+    for unit in ("", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "" or size >= 10 else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+def format_long_listing(name, node):
+    kind = "d" if node.is_dir else "-"
+    perms = "rwxr-xr-x" if node.is_dir else "rw-r--r--"
+    stamp = datetime.fromtimestamp(node.mtime).strftime("%b %d %H:%M")
+    return f"{kind}{perms} user user {node.size:>6} {stamp} {name}{'/' if node.is_dir else ''}"
+
+class SimulatorShell:
+    """Runs command lines against a VirtualFS, tracking the cwd and last exit status.
+
+    Commands are cmd_<name>(args, stdin, tty) generators yielding output lines;
+    their return value is the exit status. tty is True when the stage writes to
+    the terminal rather than a pipe or file.
+    """
+
+    def __init__(self, fs, cwd=None, on_clear=None):
+        self.fs = fs
+        self.cwd = cwd or fs.home
+        self.on_clear = on_clear
+        self.status = 0
+        self._output = []
+        self._max_lines = None
+        self._dropped = 0
+
+    def run(self, line, max_lines=None):
+        """Runs a command line and returns its stdout and stderr as one string."""
+        self._output, self._max_lines, self._dropped = [], max_lines, 0
+        try:
+            sequence = parse_command_line(line)
+        except ShellSyntaxError as e:
+            self.status = 2
+            return f"bash: {e}"
+        for connector, pipeline in sequence:
+            if (connector == "&&" and self.status != 0) or (connector == "||" and self.status == 0):
+                continue
+            self._run_pipeline(pipeline)
+        if self._dropped:
+            self._output[-1:] = [f"... [output truncated: {self._dropped + 1} more lines]"]
+        return "\n".join(self._output)
+
+    def _emit(self, line):
+        if self._max_lines is None or len(self._output) < self._max_lines:
+            self._output.append(line)
+        else:
+            self._dropped += 1
+
+    def _run_pipeline(self, pipeline):
+        statuses = [0] * len(pipeline)
+        stages = []
+        stream = iter(())
+        for index, stage in enumerate(pipeline):
+            stdin = stream
+            if stage['stdin'] is not None:
+                try:
+                    stdin = iter(self.fs.read(stage['stdin'], self.cwd).decode(errors="replace").splitlines())
+                except VFSError as e:
+                    self._emit(f"bash: {e}")
+                    statuses[index] = 1
+                    stream = iter(())
+                    continue
+            tty = index == len(pipeline) - 1 and stage['stdout'] is None
+            stream = self._run_stage(stage['argv'], stdin, tty, statuses, index)
+            stages.append(stream)
+            if stage['stdout'] is not None:
+                path, append = stage['stdout']
+                data = "".join(f"{line}\n" for line in stream).encode()
+                try:
+                    self.fs.write(path, data, self.cwd, append=append)
+                except VFSError as e:
+                    self._emit(f"bash: {e}")
+                    statuses[index] = 1
+                stream = iter(())
+        for line in stream:
+            self._emit(line)
+        # Upstream stages a filter stopped reading from are closed, not drained
+        for stage in stages:
+            stage.close()
+        self.status = statuses[-1]
+        if not self.fs.exists(self.cwd):
+            self.cwd = "/"
+
+    def _run_stage(self, argv, stdin, tty, statuses, index):
+        # The shell expands ~ and $? before the command ever sees them
+        argv = [self.fs.normalize(arg) if arg == "~" or arg.startswith("~/") else arg for arg in argv]
+        argv = [str(self.status) if arg == "$?" else arg for arg in argv]
+        name, args = argv[0], argv[1:]
+        command = getattr(self, f"cmd_{name}", None)
+        if command is None:
+            self._emit(f"Command not found: {name}. Try 'ls', 'cd', 'pwd', etc.")
+            statuses[index] = 127
+            return
+        try:
+            statuses[index] = (yield from command(args, stdin, tty)) or 0
+        except VFSError as e:
+            self._emit(f"{name}: {e}")
+            statuses[index] = 1
+
+    def _sources(self, name, paths, stdin):
+        """Returns ([(path, lines)], failed) for paths, or stdin when there are none."""
+        if not paths:
+            return [(None, stdin)], False
+        sources, failed = [], False
+        for path in paths:
+            try:
+                sources.append((path, self.fs.read(path, self.cwd).decode(errors="replace").splitlines()))
+            except VFSError as e:
+                self._emit(f"{name}: {e}")
+                failed = True
+        return sources, failed
+
+    # --- Builtins ---
+    def cmd_pwd(self, args, stdin, tty):
+        yield self.cwd
+
+    def cmd_whoami(self, args, stdin, tty):
+        yield "user"
+
+    def cmd_date(self, args, stdin, tty):
+        yield datetime.now().strftime("%a %b %d %H:%M:%S IST %Y")
+
+    def cmd_clear(self, args, stdin, tty):
+        if self.on_clear:
+            self.on_clear()
+        yield "Terminal cleared."
+
+    def cmd_echo(self, args, stdin, tty):
+        yield " ".join(args)
+
+    def cmd_cd(self, args, stdin, tty):
+        target = args[0] if args else self.fs.home
+        if not self.fs.exists(target, self.cwd):
+            self._emit(f"bash: cd: {target}: No such directory")
+            return 1
+        if not self.fs.resolve(target, self.cwd).is_dir:
+            self._emit(f"bash: cd: {target}: Not a directory")
+            return 1
+        self.cwd = self.fs.normalize(target, self.cwd)
+        yield from ()
+
+    # --- Filesystem commands ---
+    def cmd_ls(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        target = self.fs.resolve(operands[0] if operands else '.', self.cwd)
+        if not target.is_dir:
+            entries = [(target.name, target)]
+        else:
+            entries = sorted(target.children.items())
+            if 'a' not in flags:
+                entries = [(n, c) for n, c in entries if not n.startswith('.')]
+        if 'l' in flags:
+            for name, node in entries:
+                yield format_long_listing(name, node)
+        elif tty:
+            if entries:
+                yield "  ".join(f"{name}/" if node.is_dir else name for name, node in entries)
+        else:
+            for name, _ in entries:
+                yield name
+
+    def cmd_cat(self, args, stdin, tty):
+        sources, failed = self._sources("cat", args, stdin)
+        for _, lines in sources:
+            yield from lines
+        return 1 if failed else 0
+
+    def cmd_mkdir(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        if not operands:
+            self._emit("mkdir: missing operand")
+            return 1
+        for path in operands:
+            self.fs.mkdir(path, self.cwd, parents='p' in flags)
+        yield from ()
+
+    def cmd_touch(self, args, stdin, tty):
+        if not args:
+            self._emit("touch: missing file operand")
+            return 1
+        for path in args:
+            self.fs.touch(path, self.cwd)
+        yield from ()
+
+    def cmd_rm(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        if not operands:
+            self._emit("rm: missing operand")
+            return 1
+        status = 0
+        for path in operands:
+            try:
+                self.fs.remove(path, self.cwd, recursive='r' in flags or 'R' in flags)
+            except VFSError as e:
+                if not ('f' in flags and "No such file" in str(e)):
+                    self._emit(f"rm: {e}")
+                    status = 1
+        yield from ()
+        return status
+
+    def cmd_mv(self, args, stdin, tty):
+        if len(args) < 2:
+            self._emit("mv: missing destination file operand")
+            return 1
+        status = 0
+        for src in args[:-1]:
+            try:
+                self.fs.move(src, args[-1], self.cwd)
+            except VFSError as e:
+                self._emit(f"mv: {e}")
+                status = 1
+        yield from ()
+        return status
+
+    def cmd_find(self, args, stdin, tty):
+        has_start = bool(args) and not args[0].startswith('-')
+        start = args[0] if has_start else '.'
+        options = args[1:] if has_start else args
+        name_pattern = options[options.index('-name') + 1] if '-name' in options[:-1] else None
+        type_filter = options[options.index('-type') + 1] if '-type' in options[:-1] else None
+        for path, node in VirtualFS.walk(self.fs.resolve(start, self.cwd), start):
+            if name_pattern and not fnmatch.fnmatchcase(node.name or "/", name_pattern):
+                continue
+            if type_filter and (type_filter == 'd') != node.is_dir:
+                continue
+            yield path
+
+    def cmd_du(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        start = operands[0] if operands else '.'
+        totals = VirtualFS.disk_usage(self.fs.resolve(start, self.cwd), start)
+        if 's' in flags:
+            totals = totals[-1:]
+        for path, size in totals:
+            yield f"{format_du_size(size, 'h' in flags)}\t{path}"
+
+    # --- Filters ---
+    def cmd_grep(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        if not operands:
+            self._emit("Usage: grep [-ivcn] PATTERN [FILE]...")
+            return 2
+        try:
+            regex = re.compile(operands[0], re.IGNORECASE if 'i' in flags else 0)
+        except re.error as e:
+            self._emit(f"grep: {e}")
+            return 2
+        sources, failed = self._sources("grep", operands[1:], stdin)
+        show_path = len(operands) > 2
+        matched = 0
+        for path, lines in sources:
+            prefix = f"{path}:" if show_path else ""
+            count = 0
+            for number, line in enumerate(lines, 1):
+                if bool(regex.search(line)) == ('v' in flags):
+                    continue
+                count += 1
+                if 'c' not in flags:
+                    yield f"{prefix}{number}:{line}" if 'n' in flags else f"{prefix}{line}"
+            if 'c' in flags:
+                yield f"{prefix}{count}"
+            matched += count
+        return 2 if failed else (0 if matched else 1)
+
+    def cmd_wc(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        fields = [f for f in "lwc" if f in flags] or list("lwc")
+        sources, failed = self._sources("wc", operands, stdin)
+        totals = {f: 0 for f in "lwc"}
+        for path, lines in sources:
+            counts = {f: 0 for f in "lwc"}
+            for line in lines:
+                counts['l'] += 1
+                counts['w'] += len(line.split())
+                counts['c'] += len(line.encode()) + 1
+            for f in counts:
+                totals[f] += counts[f]
+            yield " ".join(f"{counts[f]:>7}" for f in fields) + (f" {path}" if path else "")
+        if len(sources) > 1:
+            yield " ".join(f"{totals[f]:>7}" for f in fields) + " total"
+        return 1 if failed else 0
+
+    def _line_count(self, args):
+        """Parses head/tail's -n N / -N option, returning (count, operands)."""
+        count, operands = 10, []
+        args = iter(args)
+        for arg in args:
+            if arg == '-n':
+                value = next(args, None)
+                if value is None:
+                    raise VFSError("option requires an argument -- 'n'")
+                arg = '-' + value
+            elif arg.startswith('-n'):
+                arg = '-' + arg[2:]
+            if arg.startswith('-') and len(arg) > 1:
+                if not arg[1:].isdigit():
+                    raise VFSError(f"invalid number of lines: '{arg[1:]}'")
+                count = int(arg[1:])
+            else:
+                operands.append(arg)
+        return count, operands
+
+    def cmd_head(self, args, stdin, tty):
+        count, operands = self._line_count(args)
+        sources, failed = self._sources("head", operands, stdin)
+        for path, lines in sources:
+            if len(sources) > 1:
+                yield f"==> {path} <=="
+            yield from itertools.islice(lines, count)
+        return 1 if failed else 0
+
+    def cmd_tail(self, args, stdin, tty):
+        count, operands = self._line_count(args)
+        sources, failed = self._sources("tail", operands, stdin)
+        for path, lines in sources:
+            if len(sources) > 1:
+                yield f"==> {path} <=="
+            yield from deque(lines, maxlen=count) if count else ()
+        return 1 if failed else 0
+
+    def cmd_sort(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        sources, failed = self._sources("sort", operands, stdin)
+        lines = [line for _, source in sources for line in source]
+        if 'n' in flags:
+            def key(line):
+                match = re.match(r"\s*(-?\d+(?:\.\d+)?)", line)
+                return (float(match.group(1)) if match else 0.0, line)
+        else:
+            key = None
+        lines.sort(key=key, reverse='r' in flags)
+        if 'u' in flags:
+            lines = [line for line, _ in itertools.groupby(lines)]
+        yield from lines
+        return 1 if failed else 0
+
+    def cmd_uniq(self, args, stdin, tty):
+        flags, operands = split_flags(args)
+        sources, failed = self._sources("uniq", operands[:1], stdin)
+        for _, lines in sources:
+            for line, group in itertools.groupby(lines):
+                count = sum(1 for _ in group)
+                if 'd' in flags and count < 2:
+                    continue
+                yield f"{count:>7} {line}" if 'c' in flags else line
+        return 1 if failed else 0
 
 
 # --- Application Mode 1: Remote Docker Manager ---
@@ -56,32 +3506,20 @@ def run_remote_manager():
     host = st.sidebar.text_input("SSH Host", placeholder="e.g., 192.168.1.10", key="ssh_host")
     username = st.sidebar.text_input("SSH Username", placeholder="e.g., admin", key="ssh_user")
     password = st.sidebar.text_input("SSH Password", type="password", key="ssh_pass")
+    multi_host = st.sidebar.checkbox("🌐 Multi-host mode", key="ssh_multi_host")
+    if multi_host:
+        hosts_text = st.sidebar.text_area("Hosts (one per line, optionally user@host)", key="ssh_hosts")
 
-    # --- Cached Function to Manage SSH Connection ---
-    @st.cache_resource(ttl=3600) # Cache the connection for 1 hour
-    def get_ssh_client(_host, _user, _pass):
-        """Creates and caches a Paramiko SSH client."""
-        try:
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            ssh.connect(hostname=_host, username=_user, password=_pass, timeout=5)
-            return ssh
-        except Exception as e:
-            # Reraise the exception to be caught later
-            raise e
-
-    def run_remote_command(ssh_client, cmd):
-        """Executes a command on the remote host using the provided client."""
-        try:
-            stdin, stdout, stderr = ssh_client.exec_command(cmd)
-            out = stdout.read().decode().strip()
-            err = stderr.read().decode().strip()
-            exit_code = stdout.channel.recv_exit_status()
-            return out, err, exit_code
-        except Exception as e:
-            return None, f"Command Execution ERROR: {e}", -1
+    pool = get_ssh_pool()
 
     # --- Main Logic ---
+    if multi_host:
+        if not (username and password):
+            st.info("ℹ️ Please enter your SSH username and password in the sidebar to connect.")
+            return
+        run_fan_out_actions(pool, parse_host_targets(hosts_text, username), password)
+        return
+
     if not (host and username and password):
         st.info("ℹ️ Please enter your SSH credentials in the sidebar to connect.")
         return
@@ -89,61 +3527,68 @@ def run_remote_manager():
     # --- Establish Connection ---
     try:
         with st.spinner("Connecting to host..."):
-            ssh_client = get_ssh_client(host, username, password)
-            # Test connection with a simple command
-            _, err, code = run_remote_command(ssh_client, "echo Connection test successful")
-            if code != 0:
-                raise Exception(f"Connection test failed: {err}")
+            ssh_client = pool.get(host, username, password)
         st.success("✅ SSH Connection Successful!")
         if st.sidebar.button("Disconnect"):
-            st.cache_resource.clear()
+            drop_docker_inventory(host, username)
+            stop_stats_sampler(host, username)
+            pool.evict(host, username)
             st.rerun()
 
     except Exception as e:
         st.error(f"🔴 Connection Failed: {e}")
-        st.cache_resource.clear() # Clear cache on failure
         return
 
-    # --- Helper functions to get docker items ---
-    def get_docker_items(command):
-        output, error, code = run_remote_command(ssh_client, command)
-        if code == 0 and output:
-            return output.splitlines()
-        return []
+    with st.sidebar.expander("🔗 Pooled Connections"):
+        pool.evict_dead()
+        st.dataframe(pool.hosts(), use_container_width=True)
+
+    # --- Cached Docker inventory for this host ---
+    inventory = get_docker_inventory(pool, host, username)
+
+    def get_inventory(kind, refresh=False):
+        """Reads containers or images from the inventory cache, surfacing errors in the UI."""
+        try:
+            return inventory.containers(refresh) if kind == "containers" else inventory.images(refresh)
+        except Exception as e:
+            st.error(f"Error: {e}")
+            return []
+
+    def show_inventory_status(kind):
+        fetched = inventory.fetched_at(kind)
+        stream = "🟢 live via docker events" if inventory.watching else "🟠 events stream down, polling"
+        when = datetime.fromtimestamp(fetched).strftime("%H:%M:%S") if fetched else "never"
+        st.caption(f"Last listed at {when} · {stream} · {inventory.events_seen} events seen")
 
     # --- UI for Docker Actions ---
     option = st.selectbox("Choose a Docker action:", [
         "List Containers", "🖼️ List Images", "Run Container", "▶️ Start Container", 
         "⏹️ Stop Container", "🗑️ Remove Container", "📥 Pull Image", "🗑️ Remove Image", 
-        "🧹 System Cleanup"
+        "🧹 System Cleanup", "📈 Live Resource Monitor"
     ])
     st.markdown("---")
 
     # --- Action Implementations ---
 
     if option == "List Containers":
-        if st.button("Show All Containers"):
-            with st.spinner("Loading containers..."):
-                cmd = "docker ps -a --format 'table {{.Names}}\\t{{.Image}}\\t{{.Status}}\\t{{.Ports}}'"
-                output, error, code = run_remote_command(ssh_client, cmd)
-                if code == 0 and output:
-                    st.code(output, language='bash')
-                elif error:
-                    st.error(f"Error: {error}")
-                else:
-                    st.warning("⚠️ No containers found.")
+        refresh = st.button("🔄 Refresh Containers")
+        with st.spinner("Loading containers..."):
+            containers = get_inventory("containers", refresh)
+        if containers:
+            st.dataframe([asdict(c) for c in containers], use_container_width=True)
+        else:
+            st.warning("⚠️ No containers found.")
+        show_inventory_status("containers")
 
     elif option == "🖼️ List Images":
-        if st.button("Show All Images"):
-            with st.spinner("Loading images..."):
-                cmd = "docker images --format 'table {{.Repository}}\\t{{.Tag}}\\t{{.ID}}\\t{{.Size}}'"
-                output, error, code = run_remote_command(ssh_client, cmd)
-                if code == 0 and output:
-                    st.code(output, language='bash')
-                elif error:
-                    st.error(f"Error: {error}")
-                else:
-                    st.warning("⚠️ No images found.")
+        refresh = st.button("🔄 Refresh Images")
+        with st.spinner("Loading images..."):
+            images = get_inventory("images", refresh)
+        if images:
+            st.dataframe([asdict(i) for i in images], use_container_width=True)
+        else:
+            st.warning("⚠️ No images found.")
+        show_inventory_status("images")
 
     elif option == "Run Container":
         with st.form("run_container_form"):
@@ -163,6 +3608,7 @@ def run_remote_manager():
                     cmd += f" {shlex.quote(image_name)}"
                     
                     output, error, code = run_remote_command(ssh_client, cmd)
+                    inventory.invalidate()
                     if code == 0:
                         st.success("Container started successfully!")
                         st.code(output, language='bash')
@@ -173,55 +3619,68 @@ def run_remote_manager():
         st.subheader(option)
         
         # Determine which containers to list based on the action
+        all_containers = get_inventory("containers")
         if option == "▶️ Start Container":
-            containers = get_docker_items("docker ps -a -f status=exited --format '{{.Names}}'")
-            action_word = "start"
-            if not containers:
-                st.info("No stopped containers to start.")
-                return
+            action_word, default_states = "start", ["exited", "created"]
         elif option == "⏹️ Stop Container":
-            containers = get_docker_items("docker ps -f status=running --format '{{.Names}}'")
-            action_word = "stop"
-            if not containers:
-                st.info("No running containers to stop.")
-                return
+            action_word, default_states = "stop", ["running"]
         else: # Remove Container
-            containers = get_docker_items("docker ps -a --format '{{.Names}}'")
-            action_word = "remove"
-            if not containers:
-                st.info("No containers to remove.")
-                return
+            action_word, default_states = "remove", []
+        if not all_containers:
+            st.info(f"No containers to {action_word}.")
+            return
 
-        container_to_act = st.selectbox(f"Select a container to {action_word}:", containers)
-        
-        if st.button(f"{option.split(' ')[0]} {action_word.capitalize()} Selected Container"):
-            if container_to_act:
-                with st.spinner(f"{action_word.capitalize()}ing {container_to_act}..."):
-                    cmd = f"docker {action_word} {shlex.quote(container_to_act)}"
-                    output, error, code = run_remote_command(ssh_client, cmd)
-                    if code == 0:
-                        st.success(f"Container '{output}' {action_word}ed successfully.")
-                    else:
-                        st.error(f"Failed to {action_word} container: {error}")
+        # --- Filters ---
+        col1, col2, col3 = st.columns(3)
+        name_pattern = col1.text_input("Name pattern", placeholder="e.g., web-*", key=f"bulk_pattern_{action_word}")
+        images = col2.multiselect("Image", sorted({c.image for c in all_containers}), key=f"bulk_images_{action_word}")
+        all_states = sorted({c.state for c in all_containers} | set(default_states))
+        states = col3.multiselect("Status", all_states, default=default_states, key=f"bulk_states_{action_word}")
+        containers = [c.name for c in filter_containers(all_containers, name_pattern, images, states)]
+        if not containers:
+            st.info(f"No containers match these filters to {action_word}.")
+            return
+
+        select_all = st.checkbox(f"Select all {len(containers)} matching containers", key=f"bulk_all_{action_word}")
+        selected = containers if select_all else st.multiselect(f"Select containers to {action_word}:", containers)
+        parallel = st.toggle("Run per container in parallel (slower, but isolates failures)", key=f"bulk_parallel_{action_word}")
+
+        if st.button(f"{option.split(' ')[0]} {action_word.capitalize()} {len(selected)} Selected Container(s)", disabled=not selected):
+            with st.spinner(f"{action_word.capitalize()}ing {len(selected)} container(s)..."):
+                results = bulk_container_action(ssh_client, action_word, selected, parallel=parallel)
+                inventory.invalidate("containers")
+            failed = [r for r in results if r["Result"] != "✅ ok"]
+            if failed:
+                st.error(f"Failed to {action_word} {len(failed)} of {len(results)} container(s).")
+            else:
+                st.success(f"{len(results)} container(s) {action_word}ed successfully.")
+            st.dataframe(results, use_container_width=True)
 
     elif option == "📥 Pull Image":
         with st.form("pull_image_form"):
             st.subheader("Pull an Image from a Registry")
             image_to_pull = st.text_input("Image Name & Tag", placeholder="e.g., ubuntu:22.04")
+            pull_timeout = st.number_input("Timeout in seconds (0 = none)", min_value=0, value=600, step=60)
             submitted = st.form_submit_button("Pull Image")
             if submitted and image_to_pull:
                 with st.spinner(f"Pulling {image_to_pull}..."):
                     cmd = f"docker pull {shlex.quote(image_to_pull)}"
-                    output, error, code = run_remote_command(ssh_client, cmd)
-                    if code == 0:
+                    try:
+                        command = render_streamed_command(ssh_client, cmd, timeout=pull_timeout or None)
+                    except Exception as e:
+                        st.error(f"Command Execution ERROR: {e}")
+                        return
+                    inventory.invalidate("images")
+                    if command.timed_out:
+                        st.error(f"Stopped waiting after {pull_timeout}s; the pull may still be running on the host.")
+                    elif command.exit_code == 0:
                         st.success(f"Image '{image_to_pull}' pulled successfully.")
-                        st.code(output)
                     else:
-                        st.error(f"Failed to pull image: {error}")
+                        st.error(f"Failed to pull image: {command.stderr}")
 
     elif option == "🗑️ Remove Image":
         st.subheader("Remove a Docker Image")
-        images = get_docker_items("docker images --format '{{.Repository}}:{{.Tag}}'")
+        images = [i.ref for i in get_inventory("images")]
         if not images:
             st.info("No images to remove.")
             return
@@ -232,6 +3691,7 @@ def run_remote_manager():
                 with st.spinner(f"Removing {image_to_remove}..."):
                     cmd = f"docker rmi {shlex.quote(image_to_remove)}"
                     output, error, code = run_remote_command(ssh_client, cmd)
+                    inventory.invalidate("images")
                     if code == 0:
                         st.success(f"Image '{image_to_remove}' removed successfully.")
                         st.code(output)
@@ -244,12 +3704,50 @@ def run_remote_manager():
         if st.button("Run System Prune", type="primary"):
             with st.spinner("Pruning Docker system..."):
                 cmd = "docker system prune -af"
-                output, error, code = run_remote_command(ssh_client, cmd)
-                if code == 0:
+                try:
+                    command = render_streamed_command(ssh_client, cmd)
+                except Exception as e:
+                    st.error(f"Command Execution ERROR: {e}")
+                    return
+                inventory.invalidate()
+                if command.exit_code == 0:
                     st.success("Docker system pruned successfully!")
-                    st.code(output)
                 else:
-                    st.error(f"Failed to prune system: {error}")
+                    st.error(f"Failed to prune system: {command.stderr}")
+
+    elif option == "📈 Live Resource Monitor":
+        st.subheader("Live Container Resource Monitor")
+        sampler = get_stats_sampler(pool, host, username)
+        col1, col2, col3 = st.columns(3)
+        interval = col1.number_input("Sample every (s)", min_value=1, max_value=300, value=int(sampler.interval))
+        history = col2.number_input("Samples kept per container", min_value=10, max_value=2000, value=sampler.history)
+        sampler.interval = interval
+        if history != sampler.history:
+            sampler.resize(history)
+        if sampler.running:
+            if col3.button("⏹️ Stop Sampling"):
+                sampler.stop()
+                st.rerun()
+        elif col3.button("▶️ Start Sampling", type="primary"):
+            sampler.start()
+            st.rerun()
+
+        if not sampler.running and not sampler.keys():
+            st.info("ℹ️ Start sampling to build up a history. Sampling keeps running in the background across reruns.")
+            return
+
+        containers = st.multiselect("Containers to chart:", sorted(sampler.keys()), key="stats_containers")
+
+        @st.fragment(run_every=interval if sampler.running else None)
+        def stats_panel():
+            if sampler.last_error:
+                st.error(f"Sampling error: {sampler.last_error}")
+            if sampler.last_sample_at:
+                st.caption(f"{sampler.samples_taken} samples · last at "
+                           f"{datetime.fromtimestamp(sampler.last_sample_at).strftime('%H:%M:%S')}")
+            render_container_stats(sampler, containers or None)
+
+        stats_panel()
 
 
 # --- Application Mode 2: Gesture Docker Controller ---
@@ -282,88 +3780,85 @@ def run_linux_simulator():
     st.write("Practice common Linux commands in a safe, simulated environment.")
     
     # Initialize session state for this mode
-    if 'term_command_history' not in st.session_state: st.session_state.term_command_history = []
+    if not isinstance(st.session_state.get('term_command_history'), deque):
+        st.session_state.term_command_history = deque(st.session_state.get('term_command_history', []), maxlen=TERMINAL_HISTORY_LIMIT)
     if 'term_current_directory' not in st.session_state: st.session_state.term_current_directory = '/home/user'
-    if 'term_directory_structure' not in st.session_state:
-        st.session_state.term_directory_structure = {
-            '/home/user': ['Documents', 'Downloads', 'Pictures', 'Desktop', 'README.txt'],
-            '/home/user/Documents': ['report.docx', 'notes.txt', 'projects'],
-            '/home/user/Documents/projects': ['alpha', 'beta'],
-            '/home/user/Downloads': ['installer.dmg', 'archive.zip'],
-            '/home/user/Pictures': ['photo.jpg'],
-            '/': ['home', 'var', 'etc', 'bin'],
-        }
+    if 'term_fs' not in st.session_state:
+        st.session_state.term_fs = vfs_from_snapshot(get_seed_snapshot())
 
-    def get_items_in_path(path):
-        return st.session_state.term_directory_structure.get(path, [])
-    
-    def get_dirs_in_path(path):
-        # A simple way to differentiate: items without '.' are considered directories
-        return [item for item in get_items_in_path(path) if '.' not in item]
+    def switch_filesystem(new_fs):
+        st.session_state.term_fs = new_fs
+        st.session_state.term_current_directory = new_fs.home
+        st.session_state.term_command_history.clear()
+        st.session_state.pop('term_shell', None)
+        st.session_state.pop('term_export', None)
 
-    def execute_safe_command(command):
-        """More robust command simulation."""
-        cmd_parts = shlex.split(command.strip())
-        if not cmd_parts: return ""
-        base_cmd = cmd_parts[0]
-        current_dir = st.session_state.term_current_directory
-
-        # Simulated commands
-        if base_cmd == 'pwd': return current_dir
-        elif base_cmd == 'whoami': return "user"
-        elif base_cmd == 'date': return datetime.now().strftime("%a %b %d %H:%M:%S IST %Y")
-        elif base_cmd == 'clear':
-            st.session_state.term_command_history = []
-            return "Terminal cleared."
-        elif base_cmd == 'echo': return " ".join(cmd_parts[1:])
-
-        elif base_cmd == 'ls':
-            items = get_items_in_path(current_dir)
-            dirs = get_dirs_in_path(current_dir)
-            if '-la' in cmd_parts or '-l' in cmd_parts:
-                output = [f"drwxr-xr-x user user 4096 Aug 13 14:00 {d}/" for d in dirs]
-                output.extend([f"-rw-r--r-- user user 1024 Aug 13 14:00 {f}" for f in items if f not in dirs])
-                return "\n".join(output) if output else ""
-            else:
-                formatted = [f"{item}/" if item in dirs else item for item in items]
-                return "  ".join(formatted) if formatted else ""
-
-        elif base_cmd == 'cd':
-            if len(cmd_parts) < 2: return "Usage: cd <directory>"
-            target = cmd_parts[1]
-            if target == '..': new_path = os.path.dirname(current_dir) if current_dir != '/' else '/'
-            elif target == '~': new_path = '/home/user'
-            elif target == '/': new_path = '/'
-            else:
-                if target in get_dirs_in_path(current_dir):
-                    new_path = os.path.join(current_dir, target)
+    with st.expander("🗂️ Filesystem Snapshots"):
+        st.caption("Practice trees are memory-mapped once and shared read-only by every session; your changes stay in your session.")
+        snap_col1, snap_col2 = st.columns(2)
+        with snap_col1:
+            choice = st.selectbox("Practice tree", ["Built-in practice tree"] + list_snapshots(), key="term_tree_choice")
+            if st.button("📂 Load tree", use_container_width=True):
+                snapshot = get_seed_snapshot() if choice == "Built-in practice tree" else get_snapshot(choice)
+                switch_filesystem(vfs_from_snapshot(snapshot))
+                st.rerun()
+            if st.button("📦 Export this session's filesystem", use_container_width=True):
+                buffer = io.BytesIO()
+                save_snapshot(st.session_state.term_fs.root, buffer)
+                st.session_state.term_export = buffer.getvalue()
+            if st.session_state.get('term_export'):
+                st.download_button("⬇️ Download snapshot (.vfs)", st.session_state.term_export,
+                                   file_name="simulator.vfs", mime="application/octet-stream", use_container_width=True)
+        with snap_col2:
+            upload = st.file_uploader("Import a snapshot or tarball", type=["vfs", "tar", "gz", "tgz"], key="term_tree_upload")
+            share_name = st.text_input("Share as practice tree named (optional)", key="term_tree_name")
+            if upload and st.button("📥 Import", use_container_width=True):
+                try:
+                    data = upload.getvalue()
+                    if upload.name.endswith(".vfs"):
+                        imported = vfs_from_snapshot(VFSSnapshot(data))
+                    else:
+                        imported = tarball_to_vfs(io.BytesIO(data))
+                except (ValueError, tarfile.TarError, VFSError) as e:
+                    st.error(f"❌ Could not import {upload.name}: {e}")
                 else:
-                    return f"bash: cd: {target}: No such directory"
-            st.session_state.term_current_directory = new_path
-            return ""
-
-        elif base_cmd == 'cat':
-            if len(cmd_parts) < 2: return "Usage: cat <file>"
-            target_file = cmd_parts[1]
-            if target_file in get_items_in_path(current_dir) and target_file not in get_dirs_in_path(current_dir):
-                return f"Simulated content of {target_file}.\nThis is a text file.\nHave a nice day."
-            else:
-                return f"cat: {target_file}: No such file or directory"
+                    if share_name.strip():
+                        name = store_snapshot(share_name, imported.root)
+                        imported = vfs_from_snapshot(get_snapshot(name))
+                    switch_filesystem(imported)
+                    st.rerun()
 
-        else:
-            return f"Command not found: {base_cmd}. Try 'ls', 'cd', 'pwd', etc."
+    fs = st.session_state.term_fs
+
+    if 'term_shell' not in st.session_state:
+        st.session_state.term_shell = SimulatorShell(fs, st.session_state.term_current_directory,
+                                                     on_clear=lambda: st.session_state.term_command_history.clear())
+    shell = st.session_state.term_shell
+
+    def execute_safe_command(command):
+        """Runs a command line through the simulator shell."""
+        output = shell.run(command, max_lines=TERMINAL_OUTPUT_MAX_LINES)
+        st.session_state.term_current_directory = shell.cwd
+        return output
+
+    def run_and_record(command):
+        output = execute_safe_command(command)
+        st.session_state.term_command_history.append({'cmd': f"$ {command}", 'out': truncate_output(output)})
 
     # --- UI Layout for the Terminal ---
     col1, col2 = st.columns([2, 1])
 
     with col1:
         st.subheader(f"📍 {st.session_state.term_current_directory}")
-        # Display history as a scrollable area
+        history = st.session_state.term_command_history
+        pages = max(1, -(-len(history) // TERMINAL_PAGE_SIZE))
+        page = 1
+        if pages > 1:
+            page = st.number_input(f"History page (1 = newest, {len(history)} commands kept)", min_value=1, max_value=pages, value=1, step=1)
+        # Display history as one scrollable transcript block
         with st.container(height=400, border=True):
-            for entry in st.session_state.term_command_history:
-                st.code(entry['cmd'], language='bash')
-                if entry['out']: # Only show output area if there is output
-                    st.text(entry['out'])
+            if history:
+                st.code(render_terminal_history(history, page), language='bash')
 
         # Command input using a form
         with st.form(key='terminal_form', clear_on_submit=True):
@@ -371,8 +3866,7 @@ def run_linux_simulator():
             submitted = st.form_submit_button("Execute")
 
         if submitted and command:
-            output = execute_safe_command(command)
-            st.session_state.term_command_history.append({'cmd': f"$ {command}", 'out': output})
+            run_and_record(command)
             st.rerun()
 
     with col2:
@@ -383,30 +3877,20 @@ def run_linux_simulator():
         quick_commands = [
             "ls", "ls -la", "pwd", "whoami", "date", 
             "cd ..", "cd ~", "cd Documents",
-            "cat README.txt", "echo 'Hello World!'"
+            "cat README.txt", "echo 'Hello World!'",
+            "mkdir -p scratch", "find ~ -name '*.txt'", "du -sh ~",
+            "find / | grep txt | head -3", "ls | wc -l"
         ]
         
         for cmd in quick_commands:
             if st.button(cmd, use_container_width=True):
-                output = execute_safe_command(cmd)
-                st.session_state.term_command_history.append({'cmd': f"$ {cmd}", 'out': output})
+                run_and_record(cmd)
                 st.rerun()
 
-    # --- UI Layout for the Terminal ---
-    st.info(f"Current Directory: {st.session_state.term_current_directory}")
-
-    # Display history
-    with st.container(height=350, border=True):
-        for entry in st.session_state.term_command_history:
-            st.code(entry['cmd'], language='bash')
-            if entry['out']: # Only display output if there is any
-                st.text(entry['out'])
-    
     # Command input
     command = st.chat_input("Type a command and press Enter...")
     if command:
-        output = execute_safe_command(command)
-        st.session_state.term_command_history.append({'cmd': f"$ {command}", 'out': output})
+        run_and_record(command)
         st.rerun()
 
 
@@ -451,23 +3935,50 @@ def run_python_menu():
     # --- Page Implementations ---
     if page == "💻 System Monitor":
         st.markdown('<div class="tool-card"><p class="tool-header">System Resource Monitor</p></div>', unsafe_allow_html=True)
-        if st.button("📊 Show System Stats"):
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.subheader("CPU")
-                cpu_percent = psutil.cpu_percent(interval=1)
-                st.metric("Usage", f"{cpu_percent}%")
-                st.progress(cpu_percent / 100)
-            with col2:
-                st.subheader("Memory")
-                mem = psutil.virtual_memory()
-                st.metric("Usage", f"{mem.percent}%")
-                st.progress(mem.percent / 100)
-            with col3:
-                st.subheader("Disk")
-                disk = psutil.disk_usage('/')
-                st.metric("Usage", f"{disk.percent}%")
-                st.progress(disk.percent / 100)
+        sampler = get_host_sampler()
+        col1, col2, col3 = st.columns(3)
+        sampler.interval = col1.number_input("Sample every (s)", min_value=1, max_value=60, value=int(sampler.interval))
+        history = col2.number_input("Samples kept", min_value=30, max_value=3600, value=sampler.history)
+        if history != sampler.history:
+            sampler.resize(history)
+        if sampler.running:
+            if col3.button("⏹️ Stop Sampling"):
+                sampler.stop()
+                st.rerun()
+        elif col3.button("▶️ Start Sampling", type="primary") or not sampler.samples_taken:
+            # Sampling starts on the first visit and keeps running across reruns and sessions
+            sampler.start()
+            st.rerun()
+
+        @st.fragment(run_every=sampler.interval if sampler.running else None)
+        def host_stats_panel():
+            if sampler.last_error:
+                st.error(f"Sampling error: {sampler.last_error}")
+            render_host_stats(sampler)
+
+        host_stats_panel()
+
+        st.subheader("🧮 Top Processes")
+        col1, col2, col3 = st.columns(3)
+        sort_by = col1.selectbox("Sort by", list(PROCESS_SORT_COLUMNS))
+        top_n = col2.slider("Top N", 5, 100, 15)
+        sampler.process_interval = col3.number_input("Scan every (s)", min_value=2, max_value=60,
+                                                     value=int(sampler.process_interval))
+
+        @st.fragment(run_every=sampler.process_interval if sampler.running else None)
+        def process_panel():
+            # Processes are only scanned while some session keeps this panel on screen
+            sampler.watch_processes()
+            rows, total = sampler.top_processes(top_n, PROCESS_SORT_COLUMNS[sort_by])
+            if not total:
+                st.info("Waiting for the first process scan...")
+                return
+            if sampler.process_scan_seconds is not None:
+                st.caption(f"{total} processes · last scan took {sampler.process_scan_seconds * 1000:.0f} ms "
+                           "· CPU and I/O are rates since the previous scan")
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        process_panel()
 
     elif page == "📱 WhatsApp Sender":
         st.markdown('<div class="tool-card"><p class="tool-header">WhatsApp Message Sender</p></div>', unsafe_allow_html=True)
@@ -479,6 +3990,7 @@ def run_python_menu():
                 if phone_number and message:
                     try:
                         with st.spinner("Opening WhatsApp Web..."):
+                            kit = lazy_import("pywhatkit")
                             kit.sendwhatmsg_instantly(phone_number, message)
                         st.success("✅ Message sent successfully!")
                     except Exception as e:
@@ -532,7 +4044,8 @@ def run_python_menu():
     elif page == "📧 Email Sender":
         st.markdown('<div class="tool-card"><p class="tool-header">Gmail Email Sender</p></div>', unsafe_allow_html=True)
         st.warning("💡 Use a **Gmail App Password** for this to work, not your regular password.")
-        with st.form("gmail_form"):
+        tab_single, tab_bulk = st.tabs(["✉️ Single Email", "📬 Bulk Mail Merge"])
+        with tab_single, st.form("gmail_form"):
             sender_email = st.text_input("📤 Your Gmail Address")
             app_password = st.text_input("🔑 Your Gmail App Password", type="password")
             recipient_email = st.text_input("📥 Recipient's Email")
@@ -553,6 +4066,92 @@ def run_python_menu():
                 except Exception as e:
                     st.error(f"❌ Failed to send email: {e}")
 
+        with tab_bulk:
+            st.caption("One message per CSV row. Use `{{column}}` in the subject and body to insert values from that row.")
+            col1, col2, col3 = st.columns(3)
+            smtp_host = col1.text_input("SMTP Host", "smtp.gmail.com", key="merge_host")
+            smtp_port = col2.number_input("Port", min_value=1, max_value=65535, value=587, key="merge_port")
+            security = col3.selectbox("Security", ["STARTTLS", "SSL/TLS", "None (local test server)"], key="merge_security")
+            col1, col2 = st.columns(2)
+            merge_sender = col1.text_input("📤 Sender Address", key="merge_sender")
+            merge_password = col2.text_input("🔑 App Password (blank to skip login)", type="password", key="merge_password")
+
+            upload = st.file_uploader("📄 Recipients CSV", type=["csv"], key="merge_csv")
+            if not upload:
+                st.info("ℹ️ Upload a CSV with one row per recipient, including an email column.")
+                return
+            csv_bytes = upload.getvalue()
+            try:
+                rows = list(csv.DictReader(io.StringIO(csv_bytes.decode("utf-8-sig"))))
+            except UnicodeDecodeError as e:
+                st.error(f"❌ {upload.name} is not UTF-8 encoded ({e.reason} at byte {e.start}); re-save it as UTF-8 CSV.")
+                return
+            except csv.Error as e:
+                st.error(f"❌ Could not parse {upload.name}: {e}")
+                return
+            if not rows:
+                st.warning("⚠️ The CSV has no rows.")
+                return
+            columns = list(rows[0])
+            guess = next((i for i, c in enumerate(columns) if "mail" in c.lower()), 0)
+            email_column = st.selectbox("Email column", columns, index=guess, key="merge_email_column")
+            st.dataframe(rows[:5], use_container_width=True)
+            merge_subject = st.text_input("📝 Subject template", "Hello {{" + columns[0] + "}}", key="merge_subject")
+            merge_body = st.text_area("💬 Body template", key="merge_body")
+            html = st.checkbox("Body is HTML", key="merge_html")
+
+            col1, col2, col3 = st.columns(3)
+            pool_size = col1.slider("SMTP connections", 1, 5, 3, key="merge_pool")
+            per_minute = col2.number_input("Max messages / minute (0 = unlimited)", min_value=0, value=60, key="merge_rate")
+            max_retries = col3.number_input("Retries for transient failures", min_value=0, max_value=10, value=3, key="merge_retries")
+
+            campaign = get_mail_merge_campaign(csv_bytes, rows, email_column, merge_sender, merge_subject, merge_body, html)
+            with st.expander("👁️ Preview first message"):
+                try:
+                    preview = campaign.build_message(rows[0])
+                    st.text(f"To: {preview['To']}\nSubject: {preview['Subject']}")
+                    st.text(preview.get_payload()[0].get_payload(decode=True).decode())
+                except (KeyError, ValueError) as e:
+                    st.error(f"❌ Row 1 cannot be rendered: {e}")
+
+            counts = campaign.counts()
+            if not campaign.running and (counts["sent"] or counts["failed"]):
+                st.info(f"ℹ️ This campaign already has {counts['sent']} sent and {counts['failed']} failed recipients "
+                        "on record; starting again skips those already sent.")
+            col1, col2 = st.columns(2)
+            retry_failed = col2.checkbox("Retry failed recipients", value=True, key="merge_retry_failed")
+            if campaign.running:
+                if col1.button("⏹️ Cancel Sending"):
+                    campaign.cancel()
+            elif col1.button("🚀 Start / Resume Sending", type="primary", disabled=not (merge_sender and merge_body)):
+                security_mode = {"STARTTLS": "starttls", "SSL/TLS": "ssl"}.get(security, "none")
+                pool = SMTPPool(smtp_host, int(smtp_port), merge_sender, merge_password, security_mode, size=pool_size)
+                campaign.start(pool, rate_per_second=per_minute / 60, max_retries=int(max_retries), retry_failed=retry_failed)
+                st.rerun()
+
+            polling = campaign.running
+
+            @st.fragment(run_every=1 if polling else None)
+            def merge_progress():
+                counts = campaign.counts()
+                total = len(campaign.rows)
+                st.progress((counts["sent"] + counts["failed"]) / total,
+                            text=f"{counts['sent']} sent · {counts['failed']} failed · {counts['pending']} pending · {campaign.status}")
+                if campaign.error:
+                    st.error(f"❌ {campaign.error}")
+                log = campaign.result_log()
+                if log:
+                    st.dataframe(log[-200:], use_container_width=True, hide_index=True)
+                    buffer = io.StringIO()
+                    writer = csv.DictWriter(buffer, fieldnames=list(log[0]))
+                    writer.writeheader()
+                    writer.writerows(log)
+                    st.download_button("⬇️ Download result log (CSV)", buffer.getvalue(), file_name=f"mail-merge-{campaign.id}.csv")
+                if polling and not campaign.running:
+                    st.rerun()  # full rerun swaps Cancel back to Start and stops the polling
+
+            merge_progress()
+
     # ... Other pages like Instagram, Web Utilities, Image Studio, Face Swap would follow a similar redesigned structure ...
 
 # --- App Mode 5: Kubernetes Dashboard ---
@@ -564,8 +4163,7 @@ def run_kubernetes_dashboard():
 
     # Check for kubernetes library and import if available
     try:
-        from kubernetes import client, config
-        from kubernetes.client.rest import ApiException
+        ApiException = lazy_import("kubernetes.client.rest").ApiException
         kubernetes_available = True
     except ImportError:
         kubernetes_available = False
@@ -577,31 +4175,74 @@ def run_kubernetes_dashboard():
 
     # --- Load Kubeconfig and Initialize API Clients ---
     try:
-        config.load_kube_config()
-        v1 = client.CoreV1Api()
-        apps_v1 = client.AppsV1Api()
+        clients = get_kube_clients()
+        v1 = clients["core"]
         st.success("✅ Successfully connected to Kubernetes cluster.")
     except Exception as e:
         st.error(f"❌ Could not load Kubernetes configuration: {e}")
         st.warning("Please ensure your `kubeconfig` file is correctly set up.")
         return
 
+    def cached_rows(kind, namespace="default"):
+        """Reads rows from the shared informer cache, waiting briefly for the initial list."""
+        informer = get_informer(kind)
+        if not informer.wait_synced():
+            st.warning(f"⏳ Still loading {kind}... {informer.last_error or ''}")
+        elif informer.last_error:
+            st.caption(f"⚠️ Watch interrupted, showing cached data: {informer.last_error}")
+        return informer.list(namespace)
+
+    def render_resource_list(kind, title, namespaced=True):
+        """Shows cached rows, or streams a paginated server-side query when selectors are given."""
+        scope = namespace if namespaced else None
+        if not namespaced:
+            st.subheader(title)
+        elif scope is None:
+            st.subheader(f"{title} in all namespaces")
+        else:
+            st.subheader(f"{title} in '{scope}' namespace")
+        with st.expander("🔎 Server-side query (label / field selectors)"):
+            with st.form(f"query_{kind}_form"):
+                label_selector = st.text_input("Label selector", placeholder="e.g., app=web,tier!=cache")
+                field_selector = st.text_input("Field selector", placeholder="e.g., status.phase=Running")
+                page_size = st.number_input("Page size", min_value=50, max_value=5000, value=500, step=50)
+                run_query = st.form_submit_button("Run Query")
+
+        if not run_query:
+            rows = cached_rows(kind, scope)
+            st.dataframe(rows, use_container_width=True)
+            st.caption(f"{len(rows)} {kind} from the live cache")
+            return
+
+        status = st.empty()
+        table = st.empty()
+        rows, pages = [], 0
+        try:
+            for page in iter_kube_pages(kind, scope, label_selector, field_selector, page_size):
+                rows.extend(page)
+                pages += 1
+                table.dataframe(rows, use_container_width=True)
+                status.caption(f"Page {pages}: {len(rows)} {kind} so far...")
+            status.caption(f"{len(rows)} {kind} matched in {pages} page(s)")
+        except ApiException as e:
+            st.error(f"Error listing {kind}: {e.reason}")
+
     st.markdown("---")
+
+    namespaces = sorted(set(get_informer("pods").namespaces()) | {"default"})
+    namespace_choice = st.sidebar.selectbox("Namespace", ["All namespaces"] + namespaces,
+                                            index=namespaces.index("default") + 1, key="kube_namespace")
+    namespace = None if namespace_choice == "All namespaces" else namespace_choice
     
     # Use a selectbox for resource navigation instead of a conflicting sidebar
     menu_option = st.selectbox(
         "Select a resource to manage:",
-        ("List Pods", "Create Pod", "Delete Pod", "List Deployments", "List Services", "List Nodes")
+        ("List Pods", "Create Pod", "Delete Pod", "List Deployments", "List Services", "List Nodes", "📊 Resource Metrics",
+         "📦 Apply Manifests")
     )
 
     if menu_option == "List Pods":
-        st.subheader("📜 Pods in 'default' namespace")
-        try:
-            pods = v1.list_namespaced_pod(namespace="default")
-            pod_data = [{"Name": p.metadata.name, "Status": p.status.phase, "Node": p.spec.node_name, "IP": p.status.pod_ip} for p in pods.items]
-            st.dataframe(pod_data, use_container_width=True)
-        except ApiException as e:
-            st.error(f"Error listing pods: {e}")
+        render_resource_list("pods", "📜 Pods")
 
     elif menu_option == "Create Pod":
         st.subheader("➕ Create a New Pod")
@@ -615,7 +4256,7 @@ def run_kubernetes_dashboard():
                     "spec": {"containers": [{"name": pod_name, "image": pod_image}]}
                 }
                 try:
-                    v1.create_namespaced_pod(namespace="default", body=pod_manifest)
+                    v1.create_namespaced_pod(namespace=namespace or "default", body=pod_manifest)
                     st.success(f"✅ Pod '{pod_name}' created successfully!")
                 except ApiException as e:
                     st.error(f"Error creating pod: {e.body}")
@@ -623,79 +4264,161 @@ def run_kubernetes_dashboard():
     elif menu_option == "Delete Pod":
         st.subheader("🗑️ Delete a Pod")
         try:
-            pods = v1.list_namespaced_pod(namespace="default").items
-            pod_list = [p.metadata.name for p in pods]
+            pod_list = sorted(f"{row['Namespace']}/{row['Name']}" for row in cached_rows("pods", namespace))
             if not pod_list:
-                st.warning("No pods found in the 'default' namespace to delete.")
+                st.warning(f"No pods found in {namespace_choice} to delete.")
             else:
                 pod_to_delete = st.selectbox("Select Pod to delete", pod_list)
                 if st.button("Delete Pod", type="primary"):
-                    v1.delete_namespaced_pod(name=pod_to_delete, namespace="default")
+                    pod_namespace, pod_name = pod_to_delete.split("/", 1)
+                    v1.delete_namespaced_pod(name=pod_name, namespace=pod_namespace)
                     st.success(f"🗑️ Pod '{pod_to_delete}' deleted successfully!")
                     st.rerun()
         except ApiException as e:
             st.error(f"Error deleting pod: {e.body}")
 
     elif menu_option == "List Deployments":
-        st.subheader("📦 Deployments in 'default' namespace")
-        try:
-            deployments = apps_v1.list_namespaced_deployment(namespace="default")
-            dep_data = [{"Name": d.metadata.name, "Replicas": d.spec.replicas, "Available": d.status.available_replicas or 0} for d in deployments.items]
-            st.dataframe(dep_data, use_container_width=True)
-        except ApiException as e:
-            st.error(f"Error listing deployments: {e}")
+        render_resource_list("deployments", "📦 Deployments")
 
     elif menu_option == "List Services":
-        st.subheader("🔌 Services in 'default' namespace")
-        try:
-            services = v1.list_namespaced_service(namespace="default")
-            svc_data = [{"Name": s.metadata.name, "Type": s.spec.type, "Cluster IP": s.spec.cluster_ip, "Ports": str(s.spec.ports)} for s in services.items]
-            st.dataframe(svc_data, use_container_width=True)
-        except ApiException as e:
-            st.error(f"Error listing services: {e}")
+        render_resource_list("services", "🔌 Services")
 
     elif menu_option == "List Nodes":
-        st.subheader("💻 Cluster Nodes")
-        try:
-            nodes = v1.list_node()
-            node_data = [{"Name": n.metadata.name, "Status": n.status.conditions[-1].type, "Kubelet Version": n.status.node_info.kubelet_version} for n in nodes.items]
-            st.dataframe(node_data, use_container_width=True)
-        except ApiException as e:
-            st.error(f"Error listing nodes: {e}")
+        render_resource_list("nodes", "💻 Cluster Nodes", namespaced=False)
+
+    elif menu_option == "📊 Resource Metrics":
+        st.subheader("📊 Node & Pod Resource Usage")
+        sampler = get_kube_metrics_sampler()
+        col1, col2, col3 = st.columns(3)
+        sampler.interval = col1.number_input("Sample every (s)", min_value=5, max_value=600, value=int(sampler.interval))
+        top_n = col2.slider("Top N", 3, 50, 10)
+        if sampler.running:
+            if col3.button("⏹️ Stop Sampling"):
+                sampler.stop()
+                st.rerun()
+        elif col3.button("▶️ Start Sampling", type="primary"):
+            sampler.start()
+            st.rerun()
+
+        if not sampler.running and not sampler.keys():
+            st.info("ℹ️ Start sampling to collect usage from the metrics API (requires metrics-server).")
+            return
+
+        @st.fragment(run_every=sampler.interval if sampler.running else None)
+        def metrics_panel():
+            if sampler.last_error:
+                st.error(f"Metrics API error: {sampler.last_error}")
+            pd = lazy_import("pandas")
+            px = lazy_import("plotly.express")
+
+            nodes_info = {row["Name"]: row for row in get_informer("nodes").list()}
+            node_rows = []
+            for name, point in sampler.latest("node").items():
+                info = nodes_info.get(name, {})
+                cpu_alloc = parse_kube_quantity(info.get("Allocatable CPU")) * 1000
+                mem_alloc = parse_kube_quantity(info.get("Allocatable Memory"))
+                node_rows.append({
+                    "Node": name, "CPU (m)": round(point["cpu_millicores"]),
+                    "CPU %": round(100 * point["cpu_millicores"] / cpu_alloc, 1) if cpu_alloc else None,
+                    "Memory (MiB)": round(point["memory_bytes"] / 1024 ** 2),
+                    "Memory %": round(100 * point["memory_bytes"] / mem_alloc, 1) if mem_alloc else None,
+                    "Pressure": info.get("Pressure") or "—",
+                })
+            pressured = [r["Node"] for r in node_rows if r["Pressure"] != "—"]
+            if pressured:
+                st.warning(f"⚠️ Nodes under pressure: {', '.join(pressured)}")
+
+            st.markdown("**Hottest nodes**")
+            node_rows.sort(key=lambda r: r["CPU %"] if r["CPU %"] is not None else r["CPU (m)"], reverse=True)
+            st.dataframe(node_rows[:top_n], use_container_width=True)
+
+            def top_pods(field):
+                return [
+                    {"Pod": name, "CPU (m)": round(p["cpu_millicores"]), "Memory (MiB)": round(p["memory_bytes"] / 1024 ** 2)}
+                    for name, p in sampler.top("pod", field, top_n)
+                ]
+
+            col1, col2 = st.columns(2)
+            col1.markdown("**Top pods by CPU**")
+            col1.dataframe(top_pods("cpu_millicores"), use_container_width=True)
+            col2.markdown("**Top pods by memory**")
+            col2.dataframe(top_pods("memory_bytes"), use_container_width=True)
+
+            history = [
+                {"Node": name, "Time": pd.to_datetime(p["time"], unit="s"), "CPU (m)": p["cpu_millicores"]}
+                for (kind, name), points in sampler.snapshot().items() if kind == "node" for p in points
+            ]
+            if history:
+                st.plotly_chart(px.line(pd.DataFrame(history), x="Time", y="CPU (m)", color="Node",
+                                        title="Node CPU over time"), use_container_width=True)
+
+        metrics_panel()
+
+    elif menu_option == "📦 Apply Manifests":
+        st.subheader("📦 Bulk Apply Manifests")
+        st.caption(f"Supported kinds: {', '.join(KUBE_APPLY_KINDS)}. Existing objects are patched.")
+        with st.form("apply_manifests_form"):
+            uploads = st.file_uploader("YAML manifests (multi-document supported)", type=["yaml", "yml"], accept_multiple_files=True)
+            default_ns = st.text_input("Namespace for objects without one", namespace or "default")
+            concurrency = st.slider("Max concurrent requests", 1, 64, 16)
+            dry_run = st.checkbox("Server-side dry run")
+            apply_btn = st.form_submit_button("Apply", type="primary")
+
+        if apply_btn and uploads:
+            try:
+                manifests = [m for upload in uploads for m in load_manifests(upload.getvalue().decode("utf-8"))]
+            except Exception as e:
+                st.error(f"Could not parse manifests: {e}")
+                return
+            if not manifests:
+                st.warning("No objects found in the uploaded files.")
+                return
+
+            progress = st.progress(0.0, text=f"Applying {len(manifests)} objects...")
+            table = st.empty()
+            results = []
+            for result in apply_manifests(manifests, default_ns, concurrency, dry_run):
+                results.append(result)
+                progress.progress(len(results) / len(manifests), text=f"{len(results)}/{len(manifests)} objects done")
+                if len(results) % 10 == 0 or len(results) == len(manifests):
+                    table.dataframe(results, use_container_width=True)
+            failed = sum(r["Result"] == "❌ failed" for r in results)
+            if failed:
+                st.error(f"{failed} of {len(results)} objects failed.")
+            else:
+                st.success(f"✅ {len(results)} objects applied{' (dry run)' if dry_run else ''}.")
 
 
 # --- App Mode 6: Git Automation ---
 def run_git_automation():
     """A UI to automate common Git and GitHub workflows."""
+    github = get_github_client()
     st.title("🐙 Git & GitHub Automation")
     st.markdown("Automate repository creation, cloning, commits, and pushes.")
     st.warning("This tool requires `git` to be installed on the machine running this app.")
 
     # --- Helper Functions ---
-    def run_command(command, cwd, log_area):
-        log_area.info(f"▶️ Running: {' '.join(command)}")
-        try:
-            result = subprocess.run(command, cwd=cwd, check=True, capture_output=True, text=True, encoding='utf-8')
-            if result.stdout: log_area.code(result.stdout, language='bash')
-            return True, result.stdout
-        except subprocess.CalledProcessError as e:
-            log_area.error(f"❌ Command failed:\n{e.stderr}")
-            return False, e.stderr
-
     def api_request(method, url, headers, json=None):
-        try:
-            response = requests.request(method, url, headers=headers, json=json)
-            response.raise_for_status()
-            return (True, response.json()) if response.content else (True, {})
-        except requests.exceptions.HTTPError as e:
-            return False, e.response.json().get('message', e.response.text)
+        return github.request(method, url, headers=headers, json=json)
 
     # --- Session State ---
     if 'git_workspace' not in st.session_state:
         st.session_state.git_workspace = tempfile.mkdtemp(prefix="git_automation_")
         st.session_state.local_repos = {} # name: path
+    if 'git_jobs' not in st.session_state:
+        st.session_state.git_jobs = [] # job ids owned by this session, newest last
 
     workspace = st.session_state.git_workspace
+    runner = get_git_job_runner()
+
+    def session_jobs():
+        return [job for job in map(runner.get, st.session_state.git_jobs) if job is not None]
+
+    # Pick up clones that finished in the background since the last rerun
+    for job in session_jobs():
+        if job.status == "succeeded" and isinstance(job.result, dict) and not job.result.get("synced"):
+            st.session_state.local_repos[job.result["repo_name"]] = job.result["local_path"]
+            job.result["synced"] = True
 
     # --- Main UI ---
     with st.expander("⚙️ Configuration & Credentials", expanded=True):
@@ -703,10 +4426,15 @@ def run_git_automation():
         github_token = st.text_input("GitHub Personal Access Token", type="password", key="github_token", help="Requires `repo`, `workflow`, and `delete_repo` scopes.")
         auth_ready = github_username and github_token
         if auth_ready: st.success("Credentials Ready!")
+        rate_limit = github.rate_limit({"Authorization": f"token {github_token}"})
+        if rate_limit:
+            reset = datetime.fromtimestamp(rate_limit["reset"]).strftime("%H:%M:%S")
+            st.caption(f"API rate limit: {rate_limit['remaining']}/{rate_limit['limit']} left, resets at {reset} · "
+                       f"{github.stats['cache_hits']} of {github.stats['requests']} requests served from the ETag cache")
 
-    headers = {"Authorization": f"token {github_token}", "Accept": "application/vnd.github.v3+json"}
+    headers = {"Authorization": f"token {github_token}"}
     
-    tab1, tab2, tab3 = st.tabs(["🚀 Create & Push New Repo", "✏️ Clone & Commit Changes", "🗑️ Delete Repo"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🚀 Create & Push New Repo", "✏️ Clone & Commit Changes", "🗑️ Delete Repo", "📚 Repo Inventory"])
 
     with tab1:
         st.subheader("1. Create a New Repository on GitHub")
@@ -719,7 +4447,7 @@ def run_git_automation():
         if create_repo_btn and repo_name:
             with st.spinner(f"Creating '{repo_name}' on GitHub..."):
                 payload = {"name": repo_name, "description": repo_desc, "private": is_private}
-                success, resp = api_request("POST", "https://api.github.com/user/repos", headers, json=payload)
+                success, resp = api_request("POST", "/user/repos", headers, json=payload)
                 if success:
                     st.success(f"✅ Repository '{repo_name}' created on GitHub!")
                     clone_url = resp.get('clone_url')
@@ -732,17 +4460,24 @@ def run_git_automation():
         
         # Clone
         clone_url = st.text_input("GitHub Repo URL to Clone (e.g., https://github.com/user/repo.git)")
+        clone_strategy = st.radio("Clone strategy", list(CLONE_STRATEGIES), horizontal=True)
         if st.button("Clone Repository", disabled=not auth_ready):
             if clone_url:
                 repo_name = clone_url.split('/')[-1].replace('.git', '')
                 local_path = str(Path(workspace) / repo_name)
-                log_area = st.container(border=True)
                 # Use token in URL for private repos
                 authed_url = clone_url.replace("https://", f"https://{github_username}:{github_token}@")
-                success, _ = run_command(["git", "clone", authed_url, local_path], workspace, log_area)
-                if success:
-                    st.session_state.local_repos[repo_name] = local_path
-                    st.success(f"Cloned '{repo_name}' to workspace.")
+
+                def clone_job(job, clone_url=clone_url, authed_url=authed_url, local_path=local_path,
+                              repo_name=repo_name, strategy=clone_strategy):
+                    if get_git_mirror_cache().clone(clone_url, authed_url, local_path, job.run_command, strategy):
+                        job.write(f"✅ Cloned '{repo_name}' to workspace.")
+                        return {"repo_name": repo_name, "local_path": local_path}
+                    return None
+
+                job = runner.submit(f"Clone {repo_name}", clone_job, lock_key=local_path, secrets=[github_token])
+                st.session_state.git_jobs.append(job.id)
+                st.info(f"Clone of '{repo_name}' queued as a background job.")
         
         # Commit and Push
         if st.session_state.local_repos:
@@ -750,24 +4485,37 @@ def run_git_automation():
             with st.form("commit_form"):
                 file_name = st.text_input("File to create/overwrite", "hello.txt")
                 file_content = st.text_area("File content", f"Hello from Streamlit at {datetime.now().isoformat()}")
+                uploads = st.file_uploader("...and/or upload files or a .zip / .tar.gz archive", accept_multiple_files=True)
+                target_dir = st.text_input("Put uploaded files under (optional)", placeholder="e.g., docs/")
                 commit_message = st.text_input("Commit Message", "Automated commit from Streamlit")
                 commit_push_btn = st.form_submit_button("Commit and Push", disabled=not auth_ready)
 
             if commit_push_btn and repo_to_modify:
-                log_area = st.container(border=True)
                 repo_path = st.session_state.local_repos[repo_to_modify]
-                # Create the file
-                with open(Path(repo_path) / file_name, "w") as f:
-                    f.write(file_content)
-                log_area.info(f"Created file '{file_name}'.")
-
-                # Run Git commands
-                run_command(["git", "config", "user.name", github_username], repo_path, log_area)
-                run_command(["git", "config", "user.email", f"{github_username}@users.noreply.github.com"], repo_path, log_area)
-                run_command(["git", "add", file_name], repo_path, log_area)
-                run_command(["git", "commit", "-m", commit_message], repo_path, log_area)
-                success, _ = run_command(["git", "push"], repo_path, log_area)
-                if success: st.success("✅ Changes pushed successfully!")
+                try:
+                    files = collect_upload_files(uploads or [], target_dir.strip())
+                    if file_name and file_content:
+                        files[safe_repo_path(file_name)] = (file_content.encode("utf-8"), False)
+                except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+                    st.error(f"❌ {e}")
+                    files = {}
+                if files:
+                    def push_job(job, repo_path=repo_path, files=files, message=commit_message, user=github_username):
+                        job.write(f"Staging {len(files)} file(s) as one commit.")
+                        ok, messages = fast_import_commit(repo_path, files, message, user, f"{user}@users.noreply.github.com")
+                        for line in messages:
+                            job.write(line)
+                        if not ok:
+                            return None
+                        ok, _ = job.run_command(["git", "push"], repo_path)
+                        if ok:
+                            job.write(f"✅ {len(files)} file(s) pushed in one commit!")
+                        return ok
+
+                    job = runner.submit(f"Commit & push {len(files)} file(s) to {repo_to_modify}", push_job,
+                                        lock_key=repo_path, secrets=[github_token])
+                    st.session_state.git_jobs.append(job.id)
+                    st.info("Commit and push queued as a background job.")
 
     with tab3:
         st.subheader("3. Delete a Repository from GitHub")
@@ -777,7 +4525,7 @@ def run_git_automation():
             if st.button("Delete from GitHub", disabled=not auth_ready, type="primary"):
                 if repo_to_delete:
                     with st.spinner(f"Deleting '{repo_to_delete}'..."):
-                        url = f"https://api.github.com/repos/{github_username}/{repo_to_delete}"
+                        url = f"/repos/{github_username}/{repo_to_delete}"
                         success, resp = api_request("DELETE", url, headers)
                         if success:
                             st.success(f"✅ Repository '{repo_to_delete}' deleted from GitHub.")
@@ -789,9 +4537,94 @@ def run_git_automation():
                 else:
                     st.warning("Please enter a repository name.")
 
+    with tab4:
+        st.subheader("4. Repository Inventory")
+        col1, col2 = st.columns([1, 2])
+        owner_type = col1.radio("List repositories of", ["Me", "User", "Organization"], horizontal=True)
+        owner = col2.text_input("User or organization name", disabled=owner_type == "Me")
+        refresh = st.button("🔄 Load / Revalidate", disabled=not auth_ready)
+
+        inventory_key = (owner_type, owner)
+        cached = st.session_state.get("github_inventory")
+        if refresh and (owner_type == "Me" or owner):
+            owner_path = quote(owner, safe="")
+            path = {"Me": "/user/repos", "User": f"/users/{owner_path}/repos",
+                    "Organization": f"/orgs/{owner_path}/repos"}[owner_type]
+            with st.spinner("Fetching all pages..."):
+                started = time.perf_counter()
+                repos, error = github.get_all_pages(path, headers)
+            if error:
+                st.error(f"❌ {error}")
+            if repos or not error:
+                # A failed first page keeps the previous listing; a partial one replaces it, with the error above
+                cached = {"key": inventory_key, "fetched": time.time(), "seconds": time.perf_counter() - started,
+                          "repos": [{
+                              "Name": r["name"], "Owner": r["owner"]["login"], "Private": r["private"],
+                              "Archived": r.get("archived", False), "Language": r.get("language") or "",
+                              "Stars": r.get("stargazers_count", 0), "Updated": r.get("updated_at", ""),
+                              "Description": r.get("description") or "",
+                          } for r in repos]}
+                st.session_state.github_inventory = cached
+
+        if cached and cached["key"] == inventory_key:
+            repos = cached["repos"]
+            st.caption(f"{len(repos)} repositories · fetched {datetime.fromtimestamp(cached['fetched']).strftime('%H:%M:%S')} "
+                       f"in {cached['seconds']:.1f}s")
+            query = st.text_input("🔎 Search name or description").strip().lower()
+            show_archived = st.checkbox("Include archived", value=True)
+            matches = [r for r in repos if (show_archived or not r["Archived"])
+                       and (not query or query in r["Name"].lower() or query in r["Description"].lower())]
+            st.dataframe(matches, use_container_width=True)
+
+            selected = st.multiselect("Select repositories for a bulk action:",
+                                      [f"{r['Owner']}/{r['Name']}" for r in matches])
+            bulk_action = st.radio("Bulk action", ["📦 Archive", "🗑️ Delete"], horizontal=True)
+            confirmed = st.checkbox(f"I understand this will {bulk_action.split()[1].lower()} {len(selected)} repositories.")
+            if st.button(f"{bulk_action} {len(selected)} selected", disabled=not (selected and confirmed and auth_ready), type="primary"):
+                def apply(full_name):
+                    if bulk_action == "🗑️ Delete":
+                        return full_name, *api_request("DELETE", f"/repos/{full_name}", headers)
+                    return full_name, *api_request("PATCH", f"/repos/{full_name}", headers, json={"archived": True})
+
+                with st.spinner(f"Running on {len(selected)} repositories..."):
+                    with ThreadPoolExecutor(max_workers=8) as executor:
+                        results = list(executor.map(apply, selected))
+                st.dataframe([{"Repository": name, "Result": "✅ ok" if ok else "❌ failed", "Error": "" if ok else str(resp)}
+                              for name, ok, resp in results], use_container_width=True)
+                done = {name for name, ok, _ in results if ok}
+                if bulk_action == "🗑️ Delete":
+                    cached["repos"] = [r for r in repos if f"{r['Owner']}/{r['Name']}" not in done]
+                else:
+                    for r in repos:
+                        if f"{r['Owner']}/{r['Name']}" in done:
+                            r["Archived"] = True
+
+    # --- Background Jobs Panel ---
+    jobs = session_jobs()
+    if jobs:
+        polling = any(not job.done for job in jobs)
+
+        @st.fragment(run_every=1 if polling else None)
+        def jobs_panel():
+            st.markdown("### 🧵 Background Jobs")
+            icons = {"queued": "⏳", "running": "🔄", "succeeded": "✅", "failed": "❌", "cancelled": "⏹️"}
+            for job in reversed(session_jobs()):
+                end = job.finished or time.time()
+                elapsed = f"{end - job.started:.1f}s" if job.started else "waiting for a worker"
+                with st.expander(f"{icons[job.status]} {job.title} · {job.status} · {elapsed}", expanded=not job.done):
+                    if not job.done and st.button("Cancel", key=f"cancel_{job.id}"):
+                        job.cancel()
+                    st.code("\n".join(job.log) or "(no output yet)", language="bash")
+            if polling and all(job.done for job in session_jobs()):
+                st.rerun()  # Full rerun: stops polling and shows new clones in the commit picker
+        jobs_panel()
+
 # --- App Mode 7: Linear Regression ---
 def run_linear_regression():
     """A simple ML model to predict temperature."""
+    pd = lazy_import("pandas")
+    plt = lazy_import("matplotlib.pyplot")
+    LinearRegression = lazy_import("sklearn.linear_model").LinearRegression
     st.title("📈 Linear Regression: Temperature Prediction")
     st.markdown("Use a simple machine learning model to predict temperature based on weather inputs.")
 
@@ -1076,6 +4909,15 @@ def run_javascript_menu():
 # --- App Mode 9: ML Dashboard ---
 def run_ml_dashboard():
     """A comprehensive dashboard for exploring an ML workflow."""
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    px = lazy_import("plotly.express")
+    lazy_import("sklearn.experimental.enable_iterative_imputer")
+    sk_impute = lazy_import("sklearn.impute")
+    SimpleImputer, KNNImputer, IterativeImputer = sk_impute.SimpleImputer, sk_impute.KNNImputer, sk_impute.IterativeImputer
+    LabelEncoder = lazy_import("sklearn.preprocessing").LabelEncoder
+    RandomForestRegressor = lazy_import("sklearn.ensemble").RandomForestRegressor
+    r2_score = lazy_import("sklearn.metrics").r2_score
 
     st.title("🚀 AI/ML Analytics Hub")
     st.markdown("An interactive dashboard to explore key stages of a machine learning project, from data cleaning to model analysis.")
@@ -1198,30 +5040,140 @@ def run_ml_dashboard():
             st.plotly_chart(fig_imp, use_container_width=True)
 
 
+# --- App Mode 10: Diagnostics ---
+def run_diagnostics():
+    """Hidden mode (see diagnostics_enabled): rerun timings, external calls, caches and profiles."""
+    pd = lazy_import("pandas")
+    px = lazy_import("plotly.express")
+
+    st.title("🩺 Diagnostics")
+    st.markdown("Where reruns spend their time, across every session served by this process.")
+    traces = [t for t in list(get_rerun_traces()) if t["mode"] != "Diagnostics"]
+    tab_modes, tab_calls, tab_cache, tab_profile = st.tabs(["⏱️ Mode Renders", "🌐 External Calls", "🗃️ Caches", "🔬 Profiler"])
+
+    with tab_modes:
+        if not traces:
+            st.info("ℹ️ No reruns recorded yet. Use the other modes, then come back.")
+        else:
+            runs = pd.DataFrame([{
+                "Time": datetime.fromtimestamp(t["time"]).strftime("%H:%M:%S"), "Mode": t["mode"],
+                "Render (ms)": round(t["seconds"] * 1000, 1), "Calls": len(t["calls"]),
+                "Call time (ms)": round(sum(c[2] for c in t["calls"]) * 1000, 1),
+                "Slowest call": max(t["calls"], key=lambda c: c[2])[1] if t["calls"] else "",
+            } for t in traces])
+            summary = runs.groupby("Mode")["Render (ms)"].describe(percentiles=[0.5, 0.95])
+            summary = summary.rename(columns={"count": "Reruns", "mean": "Mean", "50%": "p50", "95%": "p95", "max": "Max"})
+            summary["Calls / rerun"] = runs.groupby("Mode")["Calls"].mean()
+            st.dataframe(summary[["Reruns", "Mean", "p50", "p95", "Max", "Calls / rerun"]].round(1)
+                         .sort_values("p95", ascending=False), use_container_width=True)
+            st.plotly_chart(px.box(runs, x="Mode", y="Render (ms)", points="all", title="Render time per mode"),
+                            use_container_width=True)
+            st.markdown(f"**Most recent reruns** (last {len(traces)} kept)")
+            st.dataframe(runs.iloc[::-1].head(50), use_container_width=True, hide_index=True)
+
+    with tab_calls:
+        calls = pd.DataFrame([{"Kind": kind, "Call": label, "ms": seconds * 1000, "Mode": t["mode"]}
+                              for t in traces for kind, label, seconds in t["calls"]])
+        if calls.empty:
+            st.info("ℹ️ No external calls recorded on the script thread yet.")
+        else:
+            by_kind = calls.groupby("Kind")["ms"].agg(Count="count", Total="sum", Mean="mean",
+                                                     p95=lambda s: s.quantile(0.95), Max="max")
+            st.dataframe(by_kind.round(1).sort_values("Total", ascending=False), use_container_width=True)
+            st.markdown("**Slowest calls**")
+            st.dataframe(calls.nlargest(20, "ms").round(1), use_container_width=True, hide_index=True)
+        st.caption("Calls made on background threads (samplers, informers, fan-out pools) are not part of a rerun; "
+                   "they are aggregated in the metrics endpoint's histograms.")
+
+    with tab_cache:
+        counts = {}
+        for _, labels, value in get_metrics().metrics["dcc_cache_requests"].samples():
+            counts.setdefault(labels["cache"], {"Hits": 0, "Misses": 0})["Hits" if labels["result"] == "hit" else "Misses"] += value
+        if not counts:
+            st.info("ℹ️ No cache lookups recorded yet.")
+        else:
+            caches = pd.DataFrame.from_dict(counts, orient="index")
+            caches["Hit ratio"] = (caches["Hits"] / (caches["Hits"] + caches["Misses"])).round(3)
+            st.dataframe(caches, use_container_width=True)
+        timings = get_import_timings()
+        if timings:
+            st.markdown("**Lazy imports**")
+            st.dataframe(pd.DataFrame({"Module": list(timings), "ms": [round(t * 1000, 1) for t in timings.values()]})
+                         .sort_values("ms", ascending=False), use_container_width=True, hide_index=True)
+
+    with tab_profile:
+        col1, col2 = st.columns(2)
+        mode = col1.selectbox("Mode to profile", APP_MODES)
+        kind = col2.radio("Profiler", ["Sampling (flamegraph)", "cProfile"], horizontal=True)
+        if st.button("🎯 Profile its next rerun", type="primary"):
+            st.session_state.diag_profile_request = {"mode": mode, "kind": "cProfile" if kind == "cProfile" else "sampling"}
+        request = st.session_state.get("diag_profile_request")
+        if request:
+            st.info(f"ℹ️ Switch to **{request['mode']}** in the sidebar; its next rerun will be captured.")
+
+        for index, profile in enumerate(st.session_state.get("diag_profiles", [])):
+            title = (f"{profile['mode']} · {profile['kind']} · {profile['seconds'] * 1000:.0f} ms · "
+                     f"{datetime.fromtimestamp(profile['time']).strftime('%H:%M:%S')}")
+            with st.expander(title, expanded=index == 0):
+                if profile["kind"] == "cProfile":
+                    st.code(profile["report"], language="text")
+                    st.download_button("⬇️ Download .prof (snakeviz, pstats)", profile["file"],
+                                       file_name=f"rerun-{int(profile['time'])}.prof", key=f"diag_prof_{index}")
+                    continue
+                st.caption(f"{profile['samples']} stack samples")
+                if not profile["stacks"]:
+                    continue
+                # Inclusive sample counts per stack prefix form the icicle (an upside-down flamegraph)
+                nodes = {}
+                for stack, count in profile["stacks"].items():
+                    frames = stack.split(";")
+                    for depth in range(1, len(frames) + 1):
+                        prefix = ";".join(frames[:depth])
+                        nodes[prefix] = nodes.get(prefix, 0) + count
+                threshold = profile["samples"] * 0.005
+                ids = [node for node, count in nodes.items() if count >= threshold]
+                st.plotly_chart(px.icicle(ids=ids, names=[n.rpartition(";")[2] for n in ids],
+                                          parents=[n.rpartition(";")[0] for n in ids],
+                                          values=[nodes[n] for n in ids], branchvalues="total"),
+                                use_container_width=True)
+                st.download_button("⬇️ Download flamegraph (.folded for speedscope / flamegraph.pl)", profile["file"],
+                                   file_name=f"rerun-{int(profile['time'])}.folded", key=f"diag_folded_{index}")
+
+
 # --- Main Application Router ---
+APP_MODES = ("Web Playground","ML Dashboard", "Linear Regression", "Git Automation", "Kubernetes Dashboard", "Remote Docker Manager", "Linux Terminal Simulator", "Python Power Tools", "Gesture Docker Controller")
+get_metrics_server()
 st.sidebar.title("Dev Control Center ⚙️")
+# Diagnostics stays out of the menu unless the server enables it for this session
 app_mode = st.sidebar.radio(
     "Choose Application",
-    ("Web Playground","ML Dashboard", "Linear Regression", "Git Automation", "Kubernetes Dashboard", "Remote Docker Manager", "Linux Terminal Simulator", "Python Power Tools", "Gesture Docker Controller")
+    APP_MODES + (("Diagnostics",) if diagnostics_enabled() else ())
 )
 
 # Call the corresponding function for the selected app mode
-if app_mode == "Web Playground":
-    run_javascript_menu()
-elif app_mode == "ML Dashboard":
-    run_ml_dashboard()
-elif app_mode == "Linear Regression":
-    run_linear_regression()
-elif app_mode == "Git Automation":
-    run_git_automation()
-elif app_mode == "Kubernetes Dashboard":
-    run_kubernetes_dashboard()
-elif app_mode == "Remote Docker Manager":
-    run_remote_manager()
-elif app_mode == "Linux Terminal Simulator":
-    run_linux_simulator()
-elif app_mode == "Python Power Tools":
-    run_python_menu()
-elif app_mode == "Gesture Docker Controller":
-    run_gesture_controller()
-# ... other elif blocks for the rest of the apps
\ No newline at end of file
+with trace_rerun(app_mode), profile_rerun(app_mode):
+    if app_mode == "Web Playground":
+        run_javascript_menu()
+    elif app_mode == "ML Dashboard":
+        run_ml_dashboard()
+    elif app_mode == "Linear Regression":
+        run_linear_regression()
+    elif app_mode == "Git Automation":
+        run_git_automation()
+    elif app_mode == "Kubernetes Dashboard":
+        run_kubernetes_dashboard()
+    elif app_mode == "Remote Docker Manager":
+        run_remote_manager()
+    elif app_mode == "Linux Terminal Simulator":
+        run_linux_simulator()
+    elif app_mode == "Python Power Tools":
+        run_python_menu()
+    elif app_mode == "Gesture Docker Controller":
+        run_gesture_controller()
+    elif app_mode == "Diagnostics":
+        run_diagnostics()
+    # ... other elif blocks for the rest of the apps
+
+# Rendered after the mode so this rerun's first-use imports are included
+show_import_timings()
+show_metrics_exporter()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Shared fixtures: the app module loaded without its page router, and local fake HTTP servers."""
+import http.server
+import json
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+PROJECT_FILE = Path(__file__).resolve().parent.parent / "project.py"
+
+
+@pytest.fixture(scope="session")
+def project():
+    """project.py as a module, minus the router at the bottom that renders a page."""
+    pytest.importorskip("streamlit")
+    source = PROJECT_FILE.read_text(encoding="utf-8")
+    source = source[:source.index("# --- Main Application Router ---")]
+    module = types.ModuleType("project")
+    module.__file__ = str(PROJECT_FILE)
+    exec(compile(source, str(PROJECT_FILE), "exec"), module.__dict__)
+    return module
+
+
+@pytest.fixture
+def serve():
+    """Starts a ThreadingHTTPServer for a handler class and returns its base URL."""
+    servers = []
+
+    def start(handler_cls):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+class JSONHandler(http.server.BaseHTTPRequestHandler):
+    """Base handler for fakes: quiet, with a helper for JSON replies."""
+
+    def send_json(self, status, body, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def kube_server(project, serve, tmp_path, monkeypatch):
+    """Serves a handler class as the apiserver of a kubeconfig the app's Kubernetes clients load."""
+    kubernetes = pytest.importorskip("kubernetes")
+
+    def start(handler_cls):
+        kubeconfig = tmp_path / "kubeconfig"
+        kubeconfig.write_text(json.dumps({
+            "apiVersion": "v1", "kind": "Config", "current-context": "fake",
+            "clusters": [{"name": "fake", "cluster": {"server": serve(handler_cls)}}],
+            "users": [{"name": "fake", "user": {"token": "test-token"}}],
+            "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake"}}],
+        }))
+        # The client reads $KUBECONFIG once at import, so point its default location at the file instead
+        monkeypatch.setattr(kubernetes.config.kube_config, "KUBE_CONFIG_DEFAULT_LOCATION", str(kubeconfig))
+        project.get_kube_clients.clear()
+
+    yield start
+    project.get_kube_clients.clear()
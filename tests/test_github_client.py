@@ -0,0 +1,113 @@
+"""GitHubClient against a local fake GitHub API pointed to by GITHUB_API_URL."""
+import time
+
+import pytest
+
+from conftest import JSONHandler
+
+pytest.importorskip("requests")
+
+TOKEN = {"Authorization": "token test-token"}
+
+
+class FakeGitHub(JSONHandler):
+    """Serves a repository with an ETag, a rate-limited path, a flaky path and a write endpoint."""
+
+    requests = []
+    hits = {}
+
+    def reply(self, status, body=None, remaining=4999, headers=None):
+        self.send_json(status, body, {"X-RateLimit-Limit": 5000, "X-RateLimit-Remaining": remaining,
+                                      "X-RateLimit-Reset": int(time.time()) + 3600, **(headers or {})})
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path, self.headers.get("If-None-Match")))
+        hit = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/repos/octo/app":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.reply(304)
+            else:
+                self.reply(200, {"name": "app"}, headers={"ETag": '"v1"'})
+        elif self.path == "/rate_limit":
+            if hit == 1:
+                self.reply(403, {"message": "API rate limit exceeded"}, remaining=0,
+                           headers={"X-RateLimit-Reset": int(time.time())})
+            else:
+                self.reply(200, {"ok": True}, remaining=4998)
+        elif self.path == "/throttled":
+            self.reply(429, {"message": "secondary rate limit"}, headers={"Retry-After": 900})
+        elif self.path == "/flaky":
+            if hit <= 2:
+                self.reply(503, {"message": "unavailable"})
+            else:
+                self.reply(200, {"ok": True})
+        else:
+            self.reply(404, {"message": "Not Found"})
+
+    def do_POST(self):
+        self.requests.append(("POST", self.path, None))
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.reply(201, {"number": 1})
+
+
+@pytest.fixture
+def github(project, serve, monkeypatch):
+    handler = type("Handler", (FakeGitHub,), {"requests": [], "hits": {}})
+    monkeypatch.setenv("GITHUB_API_URL", serve(handler))
+    return project.GitHubClient(), handler
+
+
+def test_not_modified_returns_cached_body(github):
+    client, server = github
+
+    assert client.request("GET", "/repos/octo/app", headers=TOKEN) == (True, {"name": "app"})
+    assert client.request("GET", "/repos/octo/app", headers=TOKEN) == (True, {"name": "app"})
+
+    assert server.requests == [("GET", "/repos/octo/app", None), ("GET", "/repos/octo/app", '"v1"')]
+    assert client.stats["cache_hits"] == 1
+
+
+def test_rate_limit_headers_are_recorded_and_exhaustion_waits(project, github, monkeypatch):
+    client, server = github
+    sleeps = []
+    monkeypatch.setattr(project.time, "sleep", sleeps.append)
+
+    assert client.request("GET", "/rate_limit", headers=TOKEN) == (True, {"ok": True})
+
+    assert server.hits["/rate_limit"] == 2
+    assert client.stats["rate_limit_waits"] == 1
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= 2
+    limits = client.rate_limit(TOKEN)
+    assert limits["limit"] == 5000 and limits["remaining"] == 4998
+    assert client.rate_limit({"Authorization": "token other"}) == {}
+
+
+def test_long_retry_after_is_not_slept_out(github):
+    client, server = github
+    started = time.monotonic()
+
+    ok, message = client.request("GET", "/throttled", headers=TOKEN)
+
+    # One request, then send() refuses the 900 s wait instead of urllib3 sleeping through it
+    assert not ok and "rate limit" in message
+    assert server.hits["/throttled"] == 1
+    assert time.monotonic() - started < 5
+
+
+def test_server_errors_are_retried(github):
+    client, server = github
+
+    assert client.request("GET", "/flaky", headers=TOKEN) == (True, {"ok": True})
+    assert server.hits["/flaky"] == 3
+
+
+def test_writes_invalidate_the_etag_cache(github):
+    client, server = github
+    client.request("GET", "/repos/octo/app", headers=TOKEN)
+
+    assert client.request("POST", "/repos/octo/app/issues", headers=TOKEN, json={"title": "x"}) == (True, {"number": 1})
+    client.request("GET", "/repos/octo/app", headers=TOKEN)
+
+    # The GET after the write is unconditional, so it cannot be answered from the stale cache
+    assert server.requests[-1] == ("GET", "/repos/octo/app", None)
+    assert client.stats["cache_hits"] == 0
@@ -0,0 +1,80 @@
+"""KubeMetricsSampler against a local fake metrics.k8s.io API server reached through a kubeconfig."""
+import time
+
+import pytest
+
+from conftest import JSONHandler
+
+pytest.importorskip("kubernetes")
+
+NODE_METRICS = {"kind": "NodeMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "items": [
+    {"metadata": {"name": "node-a"}, "usage": {"cpu": "250m", "memory": "1Gi"}},
+    {"metadata": {"name": "node-b"}, "usage": {"cpu": "1500000000n", "memory": "512Mi"}},
+]}
+POD_METRICS = {"kind": "PodMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "items": [
+    {"metadata": {"name": "web-1", "namespace": "default"}, "containers": [
+        {"name": "app", "usage": {"cpu": "100m", "memory": "64Mi"}},
+        {"name": "sidecar", "usage": {"cpu": "50m", "memory": "32Mi"}},
+    ]},
+    {"metadata": {"name": "db-0", "namespace": "data"}, "containers": [
+        {"name": "postgres", "usage": {"cpu": "2", "memory": "2Gi"}},
+    ]},
+    {"metadata": {"name": "idle", "namespace": "default"}, "containers": [
+        {"name": "pause", "usage": {"cpu": "0", "memory": "10Ki"}},
+    ]},
+]}
+
+
+class FakeMetricsServer(JSONHandler):
+    routes = {
+        "/apis/metrics.k8s.io/v1beta1/nodes": NODE_METRICS,
+        "/apis/metrics.k8s.io/v1beta1/pods": POD_METRICS,
+    }
+
+    def do_GET(self):
+        body = self.routes.get(self.path.split("?")[0])
+        if body is None:
+            self.send_json(404, {"kind": "Status", "code": 404})
+        else:
+            self.send_json(200, body)
+
+
+@pytest.fixture
+def sampler(project, kube_server):
+    kube_server(FakeMetricsServer)
+    sampler = project.KubeMetricsSampler(interval=0.05, history=3)
+    yield sampler
+    sampler.stop()
+
+
+def test_quantities_are_parsed_to_millicores_and_bytes(sampler):
+    points = sampler.sample()
+
+    assert points[("node", "node-a")] == pytest.approx({"cpu_millicores": 250, "memory_bytes": 1024 ** 3})
+    assert points[("node", "node-b")] == pytest.approx({"cpu_millicores": 1500, "memory_bytes": 512 * 1024 ** 2})
+    # Pod usage is the sum over its containers
+    assert points[("pod", "default/web-1")] == pytest.approx({"cpu_millicores": 150, "memory_bytes": 96 * 1024 ** 2})
+    assert points[("pod", "data/db-0")] == pytest.approx({"cpu_millicores": 2000, "memory_bytes": 2 * 1024 ** 3})
+    assert points[("pod", "default/idle")] == pytest.approx({"cpu_millicores": 0, "memory_bytes": 10 * 1024})
+
+
+def test_top_orders_by_latest_value(sampler):
+    sampler._record(sampler.sample())
+
+    assert [name for name, _ in sampler.top("pod", "cpu_millicores", 2)] == ["data/db-0", "default/web-1"]
+    assert [name for name, _ in sampler.top("pod", "memory_bytes", 5)] == ["data/db-0", "default/web-1", "default/idle"]
+    assert [name for name, _ in sampler.top("node", "cpu_millicores", 1)] == ["node-b"]
+
+
+def test_background_history_is_bounded(sampler):
+    sampler.start()
+    deadline = time.monotonic() + 10
+    while sampler.samples_taken < 6 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    sampler.stop()
+
+    assert sampler.last_error is None
+    assert sampler.samples_taken >= 6
+    history = sampler.snapshot()
+    assert len(history) == 5
+    assert all(len(points) == 3 for points in history.values())
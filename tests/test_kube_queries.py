@@ -0,0 +1,88 @@
+"""Paginated Kubernetes queries against a local fake apiserver, with and without Table support."""
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import JSONHandler
+
+pytest.importorskip("kubernetes")
+
+PAGES = {
+    None: ([("ns1", "web-1", "Running"), ("ns1", "web-2", "Pending")], "page-2"),
+    "page-2": ([("ns2", "web-3", "Running")], None),
+}
+
+
+class FakeApiServer(JSONHandler):
+    """Lists pods two pages at a time, as a Table when asked and supported, else as a typed PodList."""
+
+    tables = True
+    requests = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        wants_table = "as=Table" in self.headers.get("Accept", "")
+        self.requests.append((url.path, query, wants_table, self.headers.get("Authorization")))
+        if url.path != "/api/v1/pods":
+            return self.send_json(404, {"kind": "Status", "code": 404})
+        if wants_table and not self.tables:
+            return self.send_json(406, {"kind": "Status", "code": 406, "reason": "NotAcceptable"})
+        pods, next_token = PAGES[query.get("continue")]
+        metadata = {"continue": next_token} if next_token else {}
+        if wants_table:
+            self.send_json(200, {
+                "kind": "Table", "apiVersion": "meta.k8s.io/v1", "metadata": metadata,
+                "columnDefinitions": [{"name": "Name", "type": "string"}, {"name": "Status", "type": "string"}],
+                "rows": [{"cells": [name, phase], "object": {"kind": "PartialObjectMetadata",
+                                                             "metadata": {"name": name, "namespace": ns}}}
+                         for ns, name, phase in pods],
+            })
+        else:
+            self.send_json(200, {
+                "kind": "PodList", "apiVersion": "v1", "metadata": metadata,
+                "items": [{"metadata": {"name": name, "namespace": ns},
+                           "spec": {"containers": [{"name": "app"}], "nodeName": "node-a"},
+                           "status": {"phase": phase, "podIP": "10.0.0.1"}}
+                          for ns, name, phase in pods],
+            })
+
+
+@pytest.fixture
+def apiserver(kube_server):
+    def start(tables=True):
+        handler = type("Handler", (FakeApiServer,), {"tables": tables, "requests": []})
+        kube_server(handler)
+        return handler
+    return start
+
+
+def test_table_pages_follow_continue_tokens(project, apiserver):
+    server = apiserver()
+
+    pages = list(project.iter_kube_pages("pods", None, "app=x", "", 2))
+
+    assert pages == [
+        [{"Namespace": "ns1", "Name": "web-1", "Status": "Running"},
+         {"Namespace": "ns1", "Name": "web-2", "Status": "Pending"}],
+        [{"Namespace": "ns2", "Name": "web-3", "Status": "Running"}],
+    ]
+    (_, first, _, auth), (_, second, _, _) = server.requests
+    assert first == {"limit": "2", "includeObject": "Metadata", "labelSelector": "app=x"}
+    assert second["continue"] == "page-2"
+    assert auth == "Bearer test-token"
+    assert all(wants_table for _, _, wants_table, _ in server.requests)
+
+
+def test_not_acceptable_falls_back_to_typed_lists(project, apiserver):
+    server = apiserver(tables=False)
+
+    pages = list(project.iter_kube_pages("pods", None, "app=x", "", 2))
+
+    assert [[(row["Namespace"], row["Name"], row["Status"]) for row in page] for page in pages] == [
+        [("ns1", "web-1", "Running"), ("ns1", "web-2", "Pending")],
+        [("ns2", "web-3", "Running")],
+    ]
+    typed = [query for _, query, wants_table, _ in server.requests if not wants_table]
+    assert [query.get("continue") for query in typed] == [None, "page-2"]
+    assert all(query["labelSelector"] == "app=x" and query["limit"] == "2" for query in typed)
@@ -0,0 +1,137 @@
+"""SMTPPool and MailMergeCampaign against a local aiosmtpd server."""
+import socket
+import threading
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller
+
+
+class Mailbox:
+    """aiosmtpd handler that records deliveries and answers RCPT from a per-address script."""
+
+    def __init__(self):
+        self.delivered = []
+        self.scripts = {}  # address: replies to give on successive RCPTs before accepting
+        self._lock = threading.Lock()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        with self._lock:
+            script = self.scripts.get(address)
+            reply = script.pop(0) if script else None
+        if reply:
+            return reply
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        with self._lock:
+            self.delivered.append((envelope.rcpt_tos[0], envelope.content.decode()))
+        return "250 OK"
+
+    def recipients(self):
+        with self._lock:
+            return [recipient for recipient, _ in self.delivered]
+
+
+@pytest.fixture
+def smtp_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    mailbox = Mailbox()
+    controller = Controller(mailbox, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield mailbox, port
+    controller.stop()
+
+
+@pytest.fixture
+def campaign_for(project, tmp_path, monkeypatch):
+    monkeypatch.setenv("MAIL_MERGE_DIR", str(tmp_path))
+    monkeypatch.setattr(project.MailMergeCampaign, "RETRY_BASE_DELAY", 0.01)
+
+    def make(addresses):
+        rows = [{"name": address.split("@")[0], "email": address} for address in addresses]
+        campaign_id = project.MailMergeCampaign.make_id(
+            "\n".join(addresses).encode(), "email", "me@example.com", "Hi {{name}}", "Hello {{ name }}!", False)
+        return project.MailMergeCampaign(campaign_id, rows, "email", "me@example.com",
+                                         "Hi {{name}}", "Hello {{ name }}!")
+    return make
+
+
+def run(project, campaign, port, size=2, **options):
+    pool = project.SMTPPool("127.0.0.1", port, security="none", size=size, timeout=5)
+    campaign.start(pool, rate_per_second=0, **options)
+    campaign._thread.join(30)
+    assert not campaign.running
+    return pool
+
+
+def test_connections_are_reused_across_messages(project, smtp_server, campaign_for):
+    mailbox, port = smtp_server
+    addresses = [f"user{i}@example.com" for i in range(12)]
+    campaign = campaign_for(addresses)
+
+    pool = run(project, campaign, port, size=2)
+
+    assert campaign.status == "finished"
+    assert campaign.counts() == {"sent": 12, "failed": 0, "pending": 0}
+    assert sorted(mailbox.recipients()) == sorted(addresses)
+    assert 1 <= pool.connections_opened <= 2
+    assert any("Hello user3!" in content and "Subject: Hi user3" in content for _, content in mailbox.delivered)
+
+
+def test_transient_failures_are_retried_and_permanent_ones_are_not(project, smtp_server, campaign_for):
+    mailbox, port = smtp_server
+    mailbox.scripts = {"flaky@example.com": ["451 try again later", "451 try again later"],
+                       "gone@example.com": ["550 no such user"]}
+    campaign = campaign_for(["flaky@example.com", "gone@example.com", "ok@example.com"])
+
+    run(project, campaign, port, max_retries=3)
+
+    results = {r["Email"]: r for r in campaign.result_log()}
+    assert results["flaky@example.com"]["Status"] == "sent" and results["flaky@example.com"]["Attempts"] == 3
+    assert results["gone@example.com"]["Status"] == "failed" and results["gone@example.com"]["Attempts"] == 1
+    assert "550" in results["gone@example.com"]["Detail"]
+    assert sorted(mailbox.recipients()) == ["flaky@example.com", "ok@example.com"]
+
+
+def test_closed_connection_is_not_reused_after_421(project, smtp_server, campaign_for):
+    mailbox, port = smtp_server
+    mailbox.scripts = {"b@example.com": ["421 closing connection"]}
+    campaign = campaign_for(["a@example.com", "b@example.com", "c@example.com"])
+
+    pool = run(project, campaign, port, size=1, max_retries=1)
+
+    results = {r["Email"]: r for r in campaign.result_log()}
+    # The retry went out on a fresh connection instead of burning an attempt on the dead one
+    assert results["b@example.com"]["Status"] == "sent" and results["b@example.com"]["Attempts"] == 2
+    assert campaign.counts()["sent"] == 3
+    assert pool.connections_opened == 2
+
+
+def test_resume_sends_only_rows_missing_from_the_log(project, smtp_server, campaign_for):
+    mailbox, port = smtp_server
+    addresses = [f"user{i}@example.com" for i in range(5)]
+    first = campaign_for(addresses)
+    run(project, first, port)
+    assert len(mailbox.delivered) == 5
+
+    # Simulate a crash after two sends: only their lines made it to the log
+    lines = first.log_path.read_text().splitlines(keepends=True)
+    first.log_path.write_text("".join(lines[:2]) + '{"Row": 4, "Ema')
+    resumed = campaign_for(addresses)
+    logged = {r["Email"] for r in resumed.result_log()}
+    assert resumed.counts() == {"sent": 2, "failed": 0, "pending": 3}
+
+    mailbox.delivered.clear()
+    run(project, resumed, port)
+
+    assert sorted(mailbox.recipients()) == sorted(set(addresses) - logged)
+    assert resumed.counts() == {"sent": 5, "failed": 0, "pending": 0}
+
+    mailbox.delivered.clear()
+    run(project, campaign_for(addresses), port)
+    assert mailbox.delivered == []